@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
 import argparse
+import array
+import bisect
 import csv
 import gzip
 import ipaddress
@@ -8,10 +10,11 @@ import json
 import logging
 import os
 import shutil
+import socket
 import sys
 import tempfile
 import urllib.request
-from typing import Optional, List, Dict, Any  # Tuple removed
+from typing import Optional, List, Dict, Any, Sequence, Tuple
 import configparser
 
 # Configuration
@@ -20,6 +23,9 @@ DEFAULT_ASN_DB_URL = "https://raw.githubusercontent.com/sapics/ip-location-db/re
 DEFAULT_DATA_DIR = os.path.expanduser("~/.ipinfo")
 DEFAULT_COUNTRY_DB_PATH = os.path.join(DEFAULT_DATA_DIR, "country_aside.csv")
 DEFAULT_ASN_DB_PATH = os.path.join(DEFAULT_DATA_DIR, "ip2asn-lite.csv")
+# Upper bound on IPs memoized by IPInfoManager.lookup_ip_info before the memo
+# is cleared.
+LOOKUP_CACHE_MAX_SIZE = 65536
 
 module_logger = logging.getLogger(__name__)
 
@@ -33,6 +39,12 @@ if __name__ == "__main__":
 def ip_to_int(
     ip_str: str, logger_override: Optional[logging.Logger] = None
 ) -> Optional[int]:
+    # Dotted-quad IPv4 is by far the common case; inet_pton parses it in C and
+    # rejects the same malformed forms ipaddress does.
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, ip_str), "big")
+    except (OSError, TypeError):
+        pass
     logger_to_use = logger_override if logger_override else module_logger
     try:
         return int(ipaddress.ip_address(ip_str))
@@ -238,6 +250,31 @@ def search_ip_in_database(
     return None
 
 
+def _pack_ints(values: List[int]) -> Sequence[int]:
+    """Packs integer IPs into an unsigned 64-bit array, or a list if too wide."""
+    try:
+        return array.array("Q", values)
+    except OverflowError:
+        return values
+
+
+def _find_range(
+    db: List[Dict[str, Any]],
+    bounds: Tuple[Sequence[int], Sequence[int]],
+    ip_int: int,
+) -> Optional[Dict[str, Any]]:
+    """Finds the entry of a sorted database whose range contains ip_int.
+
+    `bounds` holds the integer start and end IPs of each entry of `db`, in the
+    same order, so the search itself runs in C via `bisect`.
+    """
+    starts, ends = bounds
+    idx = bisect.bisect_right(starts, ip_int) - 1
+    if idx >= 0 and ip_int <= ends[idx]:
+        return db[idx]
+    return None
+
+
 class IPInfoManager:
     def __init__(
         self,
@@ -254,8 +291,30 @@ class IPInfoManager:
         self.logger = logger
         self.country_database: List[Dict[str, Any]] = []
         self.asn_database: List[Dict[str, Any]] = []
+        # Per database name: (database list the index was built from,
+        # (start IPs, end IPs)). Packed arrays keep a full ASN table's index to
+        # a few MB instead of one int object per bound.
+        self._range_bounds: Dict[
+            str, Tuple[List[Dict[str, Any]], Tuple[Sequence[int], Sequence[int]]]
+        ] = {}
+        # Results per IP string, valid for the database lists in _lookup_cache_dbs
+        self._lookup_cache: Dict[str, Optional[Dict[str, str]]] = {}
+        self._lookup_cache_dbs: Tuple[Any, Any] = (None, None)
         self._ensure_data_loaded()
 
+    def _bounds_for(
+        self, name: str, db: List[Dict[str, Any]]
+    ) -> Tuple[Sequence[int], Sequence[int]]:
+        """Returns the integer start and end IPs of db, rebuilt only when db is
+        replaced."""
+        cached = self._range_bounds.get(name)
+        if cached is None or cached[0] is not db:
+            starts = _pack_ints([int(entry["start_ip"]) for entry in db])
+            ends = _pack_ints([int(entry["end_ip"]) for entry in db])
+            cached = (db, (starts, ends))
+            self._range_bounds[name] = cached
+        return cached[1]
+
     def _ensure_data_loaded(self):
         """Ensures both databases are loaded into memory if not already."""
         if not self.country_database and os.path.exists(self.country_db_path):
@@ -307,24 +366,53 @@ class IPInfoManager:
         return country_success and asn_success
 
     def lookup_ip_info(self, ip_address_str: str) -> Optional[Dict[str, str]]:
-        """Looks up combined information (country, ASN, ASO) for a given IP address."""
+        """
+        Looks up combined information (country, ASN, ASO) for a given IP address.
+
+        Attackers repeat the same IPs many times in a log, so results are
+        memoized per IP until either database is reloaded. The returned dict
+        is shared between calls and must not be modified.
+        """
+        dbs = (self.country_database, self.asn_database)
+        if self._lookup_cache_dbs[0] is dbs[0] and self._lookup_cache_dbs[1] is dbs[1]:
+            try:
+                return self._lookup_cache[ip_address_str]
+            except KeyError:
+                pass
+        else:
+            self._lookup_cache.clear()
+            self._lookup_cache_dbs = dbs
+
+        info = self._lookup_ip_info_uncached(ip_address_str)
+        if len(self._lookup_cache) >= LOOKUP_CACHE_MAX_SIZE:
+            self._lookup_cache.clear()
+        self._lookup_cache[ip_address_str] = info
+        return info
+
+    def _lookup_ip_info_uncached(self, ip_address_str: str) -> Optional[Dict[str, str]]:
         self._ensure_data_loaded()
 
-        if ip_to_int(ip_address_str, logger_override=self.logger) is None:
+        ip_int = ip_to_int(ip_address_str, logger_override=self.logger)
+        if ip_int is None:
             return None
 
-        country_info = search_ip_in_database(
-            self.country_database, ip_address_str, self.logger
+        country_info = _find_range(
+            self.country_database,
+            self._bounds_for("country", self.country_database),
+            ip_int,
+        )
+        asn_info = _find_range(
+            self.asn_database, self._bounds_for("asn", self.asn_database), ip_int
         )
-        asn_info = search_ip_in_database(self.asn_database, ip_address_str, self.logger)
 
+        # Called for every new IP; let logging format only if DEBUG is enabled.
         if country_info and not asn_info:
             self.logger.debug(
-                f"IP {ip_address_str} found in Country DB but not ASN DB."
+                "IP %s found in Country DB but not ASN DB.", ip_address_str
             )
         if not country_info and asn_info:
             self.logger.debug(
-                f"IP {ip_address_str} found in ASN DB but not Country DB."
+                "IP %s found in ASN DB but not Country DB.", ip_address_str
             )
 
         return {
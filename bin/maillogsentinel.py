@@ -11,11 +11,10 @@ maillogsentinel.py v5 (smtplib, full sender address) :
 - From: <bash_user>@<server_fqdn>
 """
 
+import os
 import sys
 
 # import gzip  # F401: imported but unused
-import shutil
-import subprocess
 import logging
 
 # import logging.handlers  # F401: imported but unused
@@ -24,8 +23,6 @@ import argparse
 # import re  # F401: imported but unused
 import tempfile
 
-import smtplib  # F401: imported but unused
-import socket
 import csv
 
 # import getpass  # F401: imported but unused
@@ -34,32 +31,44 @@ import csv
 # from email.message import EmailMessage  # F401: imported but unused
 # from datetime import datetime  # F401: imported but unused
 from pathlib import Path
-from typing import Optional
-import ipinfo
-from lib.maillogsentinel.progress import ProgressTracker  # Updated import
+from typing import Callable, List, Optional, Set, TYPE_CHECKING
+from lib.maillogsentinel.progress import (
+    NullProgressTracker,
+    ProgressTracker,
+)
 from lib.maillogsentinel.utils import (
     check_root,
-    # list_all_logs, # This function is defined locally below
+    list_all_logs,
     is_gzip,
     LOG_LEVELS_MAP,
     STATE_FILENAME,
     LOG_FILENAME,
+    move_file,
     setup_logging,
     setup_paths,
-    read_state,
+    read_state_with_inode,
     write_state,
 )
 from lib.maillogsentinel.config import (
     AppConfig,
 )
 from lib.maillogsentinel.parser import extract_entries
-from lib.maillogsentinel.dns_utils import initialize_dns_cache, reverse_lookup
-from lib.maillogsentinel.report import send_report
-from lib.maillogsentinel.sql_exporter import run_sql_export
-from lib.maillogsentinel.sql_importer import run_sql_import  # New import
+from lib.maillogsentinel.dns_utils import (
+    initialize_dns_cache,
+    log_dns_cache_stats,
+    prefetch_batch_limit,
+    prefetch_reverse_lookups,
+    reverse_lookup,
+)
+
+# ipinfo, report (smtplib/email) and the SQL modules are imported
+# in the branches that use them, so --setup, --purge and --reset runs do not
+# pay for loading them.
+if TYPE_CHECKING:
+    import ipinfo
 
 # --- Global IPInfoManager ---
-IP_INFO_MANAGER: Optional[ipinfo.IPInfoManager] = None
+IP_INFO_MANAGER: Optional["ipinfo.IPInfoManager"] = None
 
 # --- Constants ---
 SCRIPT_NAME = "MailLogSentinel"
@@ -72,19 +81,75 @@ CSV_FILENAME = "maillogsentinel.csv"  # Keep as string
 # --- Cron utilities have been removed ---
 
 
-# --- Common utilities ---
-# F811: redefinition of unused 'list_all_logs' from line 36
-# The import from lib.maillogsentinel.utils was removed, so this is no longer a redefinition.
-def list_all_logs(maillog: Path):  # Expects Path, returns list of Paths
-    files = []
-    if maillog.is_file():  # Check if the main log path itself is a file
-        files.append(maillog)
-    # For rotated logs:
-    # Path.glob returns a generator, convert to list and sort
-    if maillog.parent.exists():  # Ensure parent directory exists before globbing
-        files.extend(sorted(list(maillog.parent.glob(maillog.name + ".*"))))
-    # Filter to ensure all are files
-    return [p for p in files if p.is_file()]
+def _backup_data_files(
+    files_to_move: List[Path],
+    logger: logging.Logger,
+    progress_tracker: ProgressTracker,
+    step_name: str,
+    operation: str,
+) -> Path:
+    """
+    Moves the existing files of `files_to_move` into a new backup directory.
+
+    The backup directory is created under the user's home directory. Used by
+    both --purge and --reset. On failure the step is reported as failed and
+    the script exits with status 1.
+
+    Returns:
+        The `Path` of the backup directory.
+    """
+    progress_tracker.start_step(step_name)
+    try:
+        backup_dir = Path(
+            tempfile.mkdtemp(prefix="maillogsentinel_backup_", dir=Path.home())
+        )
+        for file_path_obj in files_to_move:
+            if file_path_obj.is_file():
+                try:
+                    move_file(file_path_obj, backup_dir / file_path_obj.name)
+                    # Log individual file moves for logger, not for console progress
+                    logger.info(
+                        f"Moved {file_path_obj} → {backup_dir / file_path_obj.name}"
+                    )
+                except OSError as e:
+                    # Log detailed error for this specific file
+                    logger.error(f"Error moving {file_path_obj} to backup: {e}")
+                    # Raise e to be caught by the outer try/except for step completion
+                    raise
+        progress_tracker.complete_step(step_name, True)
+        progress_tracker.print_message(
+            f"Old data has been backed up to {backup_dir}", level="info"
+        )
+        return backup_dir
+    except OSError as e:
+        progress_tracker.complete_step(step_name, False, details=str(e))
+        logger.error(f"Error during backup process for {operation}: {e}")
+        progress_tracker.finalize(False, f"{operation.capitalize()} operation failed.")
+        sys.exit(1)
+
+
+def _file_inode(path: Path) -> Optional[int]:
+    """Returns the inode of `path`, or None if it has vanished (e.g. rotated away)."""
+    try:
+        return os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+
+
+def _reverse_dns_prefetch_func(
+    logger: logging.Logger,
+) -> Optional[Callable[[Set[str]], None]]:
+    """
+    Returns the DNS prefetch callback for `extract_entries`, if any.
+
+    Prefetching only warms the DNS cache, so there is nothing to do when the
+    cache is disabled or cannot hold any entry. None is returned then, which
+    keeps `extract_entries` off its batching path and saves a regex search
+    per SASL line.
+    """
+    if not prefetch_batch_limit():
+        return None
+    return lambda ips: prefetch_reverse_lookups(ips, logger)
 
 
 # --- Main ---
@@ -139,10 +204,29 @@ def main():
         action="store_true",
         help="Import .sql files from the SQL export directory into the database.",
     )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Show live step progress even when output is not a terminal.",
+    )
+    parser.add_argument(
+        "--legacy-parser",
+        action="store_true",
+        help="Parse log line headers with the original regular expression.",
+    )
     # --output-file argument is removed
     args = parser.parse_args()
 
-    progress_tracker = ProgressTracker()  # Instantiate ProgressTracker
+    # Under systemd (which sets INVOCATION_ID for every unit it starts) only
+    # errors are printed. Outside a terminal otherwise, skip progress redraws
+    # and emit the step summary in one write at the end.
+    progress_tracker: ProgressTracker
+    if os.environ.get("INVOCATION_ID") and not args.verbose:
+        progress_tracker = NullProgressTracker()
+    else:
+        progress_tracker = ProgressTracker(
+            batch=not args.verbose and not sys.stdout.isatty()
+        )
 
     config_file_explicitly_passed = args.config is not None
     if config_file_explicitly_passed:
@@ -183,6 +267,11 @@ def main():
         progress_tracker.print_message(  # Updated call
             "The setup script will handle Ctrl+C for its operations.", level="info"
         )
+        if not config_file_explicitly_passed:
+            progress_tracker.print_message(  # Updated call
+                f"On success, the configuration file will be at {DEFAULT_CONFIG_PATH}.",
+                level="info",
+            )
 
         process_args = [
             sys.executable,
@@ -190,83 +279,21 @@ def main():
             setup_source_config_path_str,
             setup_mode_flag_str,
         ]
-        process = subprocess.Popen(
-            process_args
-        )  # stdout/stderr go to parent's by default
-
-        exit_code = None
-        try:
-            exit_code = process.wait()
-        except KeyboardInterrupt:
-            progress_tracker.print_message(  # Updated call
-                "\nMain script received Ctrl+C. Waiting for setup script to complete its handling...",
-                level="info",
-            )
-            try:
-                exit_code = process.wait(timeout=15)
-            except subprocess.TimeoutExpired:
-                progress_tracker.print_message(  # Updated call
-                    "Setup script did not exit cleanly after interrupt. Terminating it.",
-                    level="warning",
-                )
-                process.terminate()
-                try:
-                    exit_code = process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    progress_tracker.print_message(  # Updated call
-                        "Setup script did not terminate. Killing it.", level="error"
-                    )
-                    process.kill()
-                    exit_code = process.wait()
-            except KeyboardInterrupt:
-                progress_tracker.print_message(  # Updated call
-                    "\nSecond Ctrl+C detected in parent. Terminating setup script forcefully.",
-                    level="warning",
-                )
-                process.terminate()
-                exit_code = process.wait()
-
-            if exit_code is None:
-                exit_code = 130
-
-        if exit_code == 0:
-            progress_tracker.print_message(
-                "Setup process completed successfully.", level="info"
-            )  # Updated call
-            if not config_file_explicitly_passed:
-                progress_tracker.print_message(  # Updated call
-                    f"Configuration file should now be at {DEFAULT_CONFIG_PATH}", "info"
-                )
-            progress_tracker.print_message(  # Updated call
-                "You can now run the application without the --setup flag (if applicable).",
-                "info",
-            )
-        elif (
-            exit_code == 1 and config_file_explicitly_passed
-        ):  # Automated setup might fail with 1
-            progress_tracker.print_message(  # Updated call
-                f"Automated setup process failed with exit code {exit_code}.", "error"
-            )
-        elif exit_code == 1:  # Interactive setup specific message for non-zero exit
-            progress_tracker.print_message(  # Updated call
-                "Setup process was interrupted or failed, but user chose not to proceed with cancellation within setup; script exited as requested.",
-                level="info",
-            )
-        else:
-            progress_tracker.print_message(  # Updated call
-                f"Setup script finished with a non-standard exit code: {exit_code}.",
-                level="warning",
-            )
-
-        sys.exit(exit_code)
+        # Replace this process with the setup script: it owns the terminal
+        # (and Ctrl+C) directly and its exit status becomes ours.
+        progress_tracker.flush()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execv(sys.executable, process_args)
 
     # If not --setup, proceed with normal operation.
     check_root()  # Ensure not running as root for normal operations
 
+    # Parse the configuration once; purge, reset and normal operation share it.
+    app_config = AppConfig(config_file_path_for_ops, logger=None)
+
     if args.purge:
         progress_tracker.start_step("Initializing purge operation")  # Updated call
-        # Use config_file_path_for_ops for AppConfig initialization
-        app_config = AppConfig(config_file_path_for_ops, logger=None)
         app_config.exit_if_not_loaded(  # This method might need adjustment if it assumes config_path attribute directly
             "Purge operation cannot proceed without a valid configuration."
         )
@@ -278,56 +305,17 @@ def main():
             "Initializing purge operation", True
         )  # Translated # Updated call
 
-        progress_tracker.start_step(
-            "Backing up data and logs"
-        )  # Translated # Updated call
-        try:
-            backup_parent_dir = Path.home()
-            backup_dir = Path(
-                tempfile.mkdtemp(
-                    prefix="maillogsentinel_backup_", dir=backup_parent_dir
-                )
-            )
-            files_to_move = [
+        _backup_data_files(
+            [
                 statedir / STATE_FILENAME,
                 workdir / app_config.csv_filename,
                 workdir / LOG_FILENAME,
-            ]
-            for file_path_obj in files_to_move:
-                if file_path_obj.is_file():
-                    try:
-                        shutil.move(
-                            str(file_path_obj), str(backup_dir / file_path_obj.name)
-                        )
-                        # Log individual file moves for logger, not for console progress
-                        logger_purge.info(
-                            f"Moved {file_path_obj} → {backup_dir / file_path_obj.name}"
-                        )
-                    except (shutil.Error, OSError) as e:
-                        # Log detailed error for this specific file
-                        logger_purge.error(
-                            f"Error moving {file_path_obj} to backup: {e}"
-                        )
-                        # Raise e to be caught by the outer try/except for step completion
-                        raise
-            progress_tracker.complete_step(
-                "Backing up data and logs", True
-            )  # Translated # Updated call
-            progress_tracker.print_message(  # Updated call
-                f"Old data has been backed up to {backup_dir}",  # Translated
-                level="info",
-            )
-        except OSError as e:
-            progress_tracker.complete_step(  # Updated call
-                "Backing up data and logs", False, details=str(e)  # Translated
-            )
-            logger_purge.error(
-                f"Error during backup process: {e}"
-            )  # Log the error that caused failure
-            progress_tracker.finalize(
-                False, "Purge operation failed."
-            )  # Translated # Updated call
-            sys.exit(1)
+            ],
+            logger_purge,
+            progress_tracker,
+            step_name="Backing up data and logs",
+            operation="purge",
+        )
 
         logger_purge.info("Purge completed. Old data backed up.")
         progress_tracker.finalize(  # Updated call
@@ -338,8 +326,6 @@ def main():
 
     if args.reset:
         progress_tracker.start_step("Initializing reset operation")  # Updated call
-        # Use config_file_path_for_ops for AppConfig initialization
-        app_config = AppConfig(config_file_path_for_ops, logger=None)
         app_config.exit_if_not_loaded(
             "Reset operation cannot proceed without a valid configuration."
         )
@@ -351,53 +337,17 @@ def main():
             "Initializing reset operation", True
         )  # Translated # Updated call
 
-        progress_tracker.start_step(
-            "Backing up data and logs for reset"
-        )  # Translated # Updated call
-        try:
-            backup_parent_dir = Path.home()
-            backup_dir = Path(
-                tempfile.mkdtemp(
-                    prefix="maillogsentinel_backup_", dir=backup_parent_dir
-                )
-            )
-            files_to_move = [
+        backup_dir = _backup_data_files(
+            [
                 statedir / STATE_FILENAME,
                 workdir / app_config.csv_filename,
                 workdir / LOG_FILENAME,
-            ]
-            for file_path_obj in files_to_move:
-                if file_path_obj.is_file():
-                    try:
-                        shutil.move(
-                            str(file_path_obj), str(backup_dir / file_path_obj.name)
-                        )
-                        logger_reset.info(
-                            f"Moved {file_path_obj} → {backup_dir / file_path_obj.name}"
-                        )
-                    except (shutil.Error, OSError) as e:
-                        logger_reset.error(
-                            f"Error moving {file_path_obj} to backup: {e}"
-                        )
-                        raise
-            progress_tracker.complete_step(
-                "Backing up data and logs for reset", True
-            )  # Translated # Updated call
-            progress_tracker.print_message(  # Updated call
-                f"Old data has been backed up to {backup_dir}",  # Translated
-                level="info",
-            )
-        except OSError as e:
-            progress_tracker.complete_step(  # Updated call
-                "Backing up data and logs for reset",  # Translated
-                False,
-                details=str(e),
-            )
-            logger_reset.error(f"Error during backup process for reset: {e}")
-            progress_tracker.finalize(
-                False, "Reset operation failed."
-            )  # Translated # Updated call
-            sys.exit(1)
+            ],
+            logger_reset,
+            progress_tracker,
+            step_name="Backing up data and logs for reset",
+            operation="reset",
+        )
 
         if (
             app_config.log_level not in LOG_LEVELS_MAP
@@ -415,8 +365,6 @@ def main():
 
     # --- Normal Operation Flow & --report common initialization ---
     overall_success_flag = True
-    # Use config_file_path_for_ops for AppConfig initialization
-    app_config = AppConfig(config_file_path_for_ops, logger=None)
 
     # Handle config loading messages
     if not app_config.config_loaded_successfully:
@@ -475,6 +423,7 @@ def main():
         workdir, statedir, maillog_path, country_db_path, asn_db_path = setup_paths(
             app_config
         )
+        asn_db_str, country_db_str = os.fspath(asn_db_path), os.fspath(country_db_path)
         progress_tracker.complete_step(
             "Initializing paths", True
         )  # Translated # Updated call
@@ -491,6 +440,50 @@ def main():
         overall_success_flag = False
         sys.exit(1)
 
+    # --- SQL Export Mode ---
+    # These modes only work on the existing CSV/SQL files, so they run before
+    # the GeoIP and DNS initialization needed for log extraction.
+    if args.sql_export:
+        progress_tracker.print_message("Starting SQL export process...", level="info")
+
+        # The AppConfig (app_config) and logger should already be initialized from the common block.
+        # Paths (workdir, statedir etc.) should also be initialized.
+
+        # Directly call run_sql_export
+        # Ensure sql_exporter.py is adapted to use AppConfig object correctly.
+        from lib.maillogsentinel.sql_exporter import run_sql_export
+
+        export_successful = run_sql_export(
+            config=app_config, output_log_level=app_config.log_level
+        )
+
+        if export_successful:
+            progress_tracker.finalize(True, "SQL export completed successfully.")
+            logger.info(f"=== End of {SCRIPT_NAME} execution (SQL export mode) ===")
+        else:
+            progress_tracker.finalize(False, "SQL export failed.")
+            logger.error(f"=== {SCRIPT_NAME} execution failed (SQL export mode) ===")
+        sys.exit(0 if export_successful else 1)
+
+    # --- SQL Import Mode ---
+    if args.sql_import:
+        progress_tracker.print_message("Starting SQL import process...", level="info")
+
+        # AppConfig, logger, paths should be initialized from the common block.
+        from lib.maillogsentinel.sql_importer import run_sql_import
+
+        import_successful = run_sql_import(
+            config=app_config, output_log_level=app_config.log_level
+        )
+
+        if import_successful:
+            progress_tracker.finalize(True, "SQL import completed successfully.")
+            logger.info(f"=== End of {SCRIPT_NAME} execution (SQL import mode) ===")
+        else:
+            progress_tracker.finalize(False, "SQL import failed.")
+            logger.error(f"=== {SCRIPT_NAME} execution failed (SQL import mode) ===")
+        sys.exit(0 if import_successful else 1)
+
     if overall_success_flag:
         progress_tracker.start_step(
             "Initializing GeoIP/ASN databases"
@@ -498,11 +491,13 @@ def main():
         progress_tracker.update_indeterminate_progress(
             "Loading/Updating..."
         )  # Translated # Updated call
+        import ipinfo
+
         try:
             global IP_INFO_MANAGER
             IP_INFO_MANAGER = ipinfo.IPInfoManager(
-                asn_db_path=str(app_config.asn_db_path),
-                country_db_path=str(app_config.country_db_path),
+                asn_db_path=asn_db_str,
+                country_db_path=country_db_str,
                 asn_db_url=app_config.asn_db_url,
                 country_db_url=app_config.country_db_url,
                 logger=logger,
@@ -580,6 +575,10 @@ def main():
         progress_tracker.update_indeterminate_progress(
             "In progress..."
         )  # Translated # Updated call
+        import smtplib
+        import socket
+        from lib.maillogsentinel.report import send_report
+
         try:
             send_report(
                 app_config=app_config,
@@ -618,8 +617,9 @@ def main():
         "Reading previous state (offset)"
     )  # Translated # Updated call
     last_off = -1  # Initialize to a value indicating failure or not read
+    last_ino = None  # Inode of the main log the offset refers to, if recorded
     try:
-        last_off = read_state(statedir, logger)
+        last_off, last_ino = read_state_with_inode(statedir, logger)
         progress_tracker.complete_step(  # Updated call
             "Reading previous state (offset)",
             True,
@@ -639,8 +639,37 @@ def main():
         "Identifying log files to process"
     )  # Translated # Updated call
     to_proc = []
+    rotated_offsets = {}  # Rotated files to resume mid-file (previous main log)
     try:
-        to_proc = list_all_logs(maillog_path) if last_off == 0 else [maillog_path]
+        if last_off == 0:
+            to_proc = list_all_logs(maillog_path)
+        else:
+            to_proc = [maillog_path]
+            # A missing main log is reported by extract_entries.
+            maillog_ino = _file_inode(maillog_path)
+            if last_ino is not None and maillog_ino not in (None, last_ino):
+                # The log was rotated since the last run. Finish the old file
+                # from the saved offset if it is still uncompressed, then read
+                # the new main log from the start.
+                previous_log = next(
+                    (
+                        p
+                        for p in list_all_logs(maillog_path)
+                        if p != maillog_path
+                        and not is_gzip(p)
+                        # Skips files logrotate removed since the scan
+                        and _file_inode(p) == last_ino
+                    ),
+                    None,
+                )
+                logger.info(
+                    f"Rotation detected for {maillog_path.name} (inode changed), "
+                    f"previous log: {previous_log.name if previous_log else 'not found'}"
+                )
+                if previous_log:
+                    to_proc = [previous_log, maillog_path]
+                    rotated_offsets = {previous_log: last_off}
+                last_off = 0
         progress_tracker.complete_step(  # Updated call
             "Identifying log files to process",  # Translated
             True,
@@ -664,8 +693,9 @@ def main():
     )  # Translated # Updated call
     # update_indeterminate_progress("Traitement en cours...") # REMOVED
     new_off = -1
+    main_log_ino = None  # Inode of the main log as read by extract_entries
     try:
-        new_off = extract_entries(
+        new_off, main_log_ino = extract_entries(
             filepaths=to_proc,
             maillog_path_obj=maillog_path,
             csvpath_param=str(csv_file_to_extract),
@@ -675,6 +705,11 @@ def main():
             is_gzip_func=is_gzip,
             offset=last_off,
             progress_callback=progress_tracker.update_progress,  # ADDED # Updated call
+            prefetch_func=_reverse_dns_prefetch_func(logger),
+            rotated_offsets=rotated_offsets,
+            legacy_parser=args.legacy_parser,
+            max_workers=app_config.parse_workers,
+            prefetch_max_ips=prefetch_batch_limit(),
         )
         # Handle different outcomes of extract_entries regarding new_off
         # The success/failure of complete_step for "Extracting log entries"
@@ -710,6 +745,7 @@ def main():
             "Extracting entries from log files", False, details=str(e)
         )  # Translated
         overall_success_flag = False
+    log_dns_cache_stats(logger)
 
     if overall_success_flag:  # Only write state if extraction was considered successful
         progress_tracker.start_step(
@@ -721,8 +757,14 @@ def main():
             if new_off != -1 or (
                 new_off == -1 and last_off == 0 and not to_proc
             ):  # allow writing -1 if it was initial state and no files
+                # The inode comes from the handle the offset was measured on,
+                # not a fresh stat, so a rotation during extraction cannot pair
+                # the old file's offset with the new file's inode.
                 write_state(
-                    statedir, new_off if new_off != -1 else last_off, logger
+                    statedir,
+                    new_off if new_off != -1 else last_off,
+                    logger,
+                    inode=main_log_ino,
                 )  # write last_off if new_off is -1 from no new entries
                 progress_tracker.complete_step(  # Updated call
                     "Saving new state (offset)",  # Translated
@@ -759,64 +801,6 @@ def main():
             False, f"{SCRIPT_NAME} encountered errors."
         )  # Translated # Updated call
 
-    # --- SQL Export Mode ---
-    if args.sql_export:
-        if (
-            not overall_success_flag
-        ):  # Checks if initializations like config, logging, paths were okay
-            progress_tracker.finalize(
-                False,
-                "Cannot proceed with SQL export due to previous initialization errors.",
-            )
-            sys.exit(1)
-
-        progress_tracker.print_message("Starting SQL export process...", level="info")
-
-        # The AppConfig (app_config) and logger should already be initialized from the common block.
-        # Paths (workdir, statedir etc.) should also be initialized.
-        # IP_INFO_MANAGER and DNS cache also initialized if overall_success_flag is true.
-
-        # Directly call run_sql_export
-        # Ensure sql_exporter.py is adapted to use AppConfig object correctly.
-        export_successful = run_sql_export(
-            config=app_config, output_log_level=app_config.log_level
-        )
-
-        if export_successful:
-            progress_tracker.finalize(True, "SQL export completed successfully.")
-            logger.info(f"=== End of {SCRIPT_NAME} execution (SQL export mode) ===")
-        else:
-            progress_tracker.finalize(False, "SQL export failed.")
-            logger.error(f"=== {SCRIPT_NAME} execution failed (SQL export mode) ===")
-        sys.exit(0 if export_successful else 1)
-
-    # --- SQL Import Mode ---
-    if args.sql_import:
-        if (
-            not overall_success_flag
-        ):  # Checks if initializations like config, logging, paths were okay
-            progress_tracker.finalize(
-                False,
-                "Cannot proceed with SQL import due to previous initialization errors.",
-            )
-            sys.exit(1)
-
-        progress_tracker.print_message("Starting SQL import process...", level="info")
-
-        # AppConfig, logger, paths should be initialized from the common block.
-
-        import_successful = run_sql_import(
-            config=app_config, output_log_level=app_config.log_level
-        )
-
-        if import_successful:
-            progress_tracker.finalize(True, "SQL import completed successfully.")
-            logger.info(f"=== End of {SCRIPT_NAME} execution (SQL import mode) ===")
-        else:
-            progress_tracker.finalize(False, "SQL import failed.")
-            logger.error(f"=== {SCRIPT_NAME} execution failed (SQL import mode) ===")
-        sys.exit(0 if import_successful else 1)
-
 
 if __name__ == "__main__":
     main()
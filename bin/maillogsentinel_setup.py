@@ -22,6 +22,7 @@ import shutil
 import subprocess
 import configparser
 import tempfile
+import traceback
 
 # import curses    # Removed
 # import curses.textpad # Removed
@@ -42,7 +43,6 @@ from pathlib import Path
 #     Optional,
 #     Any,
 # )
-import copy  # For deepcopy of default config
 import re  # For systemd unit generation input validation
 import pwd  # For user validation
 
@@ -60,6 +60,26 @@ DEFAULT_STATE_DIR = Path("/var/lib/maillogsentinel")
 DEFAULT_MAIL_LOG = Path("/var/log/mail.log")
 DEFAULT_COUNTRY_DB_PATH = Path("/var/lib/maillogsentinel/country_aside.csv")
 DEFAULT_ASN_DB_PATH = Path("/var/lib/maillogsentinel/asn.csv")
+# "HH:MM" report times, converted to a daily systemd OnCalendar expression
+HHMM_RE = re.compile(r"\d{2}:\d{2}")
+# Set MLS_SETUP_DEBUG=1 to also log the raw and effective value of every
+# interactive answer to the setup log.
+_DEBUG_INPUT_TRACE = os.environ.get("MLS_SETUP_DEBUG") == "1"
+# Keys interactive setup never prompts for, with the reason logged when their
+# default value is kept.
+_NON_INTERACTIVE_KEYS = {
+    "geolocation": {"country_db_url": "default, not configurable"},
+    "ASN_ASO": {"asn_db_url": "default, not configurable"},
+    "sqlite_database": {
+        "db_type": "fixed to sqlite3 for now",
+        "user": "not used for SQLite",
+        "password_hash": "not used for SQLite",
+        "salt": "not used for SQLite",
+    },
+}
+# Results of 'systemd-analyze calendar', keyed by (command path, expression).
+# The value is None for a valid expression, otherwise the error text reported.
+_calendar_cache = {}
 
 # Global variables for signal handling and cleanup
 # sigint_received = False # No longer used with custom exception
@@ -87,40 +107,72 @@ def _setup_print_and_log(
     is_prompt: bool = False,
     end: str = "\n",
     console_out: bool = True,
+    flush: bool = False,
 ):
     """
     Prints a message to the console and/or writes it to the provided file_handle.
 
+    Output is left to normal stdio buffering and only flushed for prompts
+    and when explicitly requested (errors, end of a setup phase).
+
     Args:
         message: The message string.
-        file_handle: Open file handle for logging.
+        file_handle: Open binary file handle for logging.
         is_prompt: If True, prints to console with end='' (for input prompts).
                    If False, uses 'end' parameter for console.
         end: String appended after the message in console (if not is_prompt).
         console_out: If False, message is only written to log file, not console.
+        flush: If True, flushes the console and the log file after writing.
     """
+    log_open = file_handle is not None and not file_handle.closed
+    if not console_out and not log_open:
+        return
+
     # Print to console if console_out is True
     if console_out:
         if is_prompt:
             print(message, end="", flush=True)
         else:
-            print(message, end=end, flush=True)
+            print(message, end=end, flush=flush)
 
     # Write to log file
-    if file_handle and not file_handle.closed:
+    if log_open:
         try:
-            file_handle.write(message + "\n")  # Always add newline for log file entries
-            file_handle.flush()
+            # Always add newline for log file entries
+            file_handle.write(message.encode("utf-8") + b"\n")
+            if is_prompt or flush:
+                # Make sure the log is current while waiting on user input
+                # or after an error
+                file_handle.flush()
         except IOError as e:
             # If logging fails, print an error to actual stderr.
-            original_stderr_print_for_logging_error = functools.partial(
-                print, file=sys.stderr, flush=True
-            )
-            original_stderr_print_for_logging_error(
-                f"ERROR: Could not write to setup log file: {e}"
+            print(
+                f"ERROR: Could not write to setup log file: {e}",
+                file=sys.stderr,
+                flush=True,
             )
 
 
+# User database lookups can go through slow NSS backends (LDAP, sssd) and the
+# answers do not change while setup runs, so resolve each name only once.
+@functools.lru_cache(maxsize=None)
+def _cached_getpwnam(user_name: str):
+    """Returns pwd.getpwnam(user_name); KeyError for unknown users is not cached."""
+    return pwd.getpwnam(user_name)
+
+
+@functools.lru_cache(maxsize=None)
+def _which(command: str):
+    """Returns shutil.which(command); PATH does not change while setup runs."""
+    return shutil.which(command)
+
+
+@functools.lru_cache(maxsize=1)
+def _cached_getuser() -> str:
+    """Returns getpass.getuser(), looked up once per process."""
+    return getpass.getuser()
+
+
 def _change_ownership(path_to_change, user_name, setup_log_fh):
     """Attempts to change the ownership of the given path to the specified user."""
     _setup_print_and_log(
@@ -128,7 +180,9 @@ def _change_ownership(path_to_change, user_name, setup_log_fh):
         setup_log_fh,
     )
     try:
-        shutil.chown(str(path_to_change), user=user_name, group=None)
+        # Same as shutil.chown(path, user=user_name), but the uid lookup is
+        # shared by every path handed to the same user.
+        os.chown(path_to_change, _cached_getpwnam(user_name).pw_uid, -1)
         _setup_print_and_log(
             f"Successfully changed ownership of {path_to_change} to {user_name}.",
             setup_log_fh,
@@ -148,6 +202,87 @@ def _change_ownership(path_to_change, user_name, setup_log_fh):
 # The _update_progress_display function was already simplified.
 
 
+def _run_calendar_validation(systemd_analyze_cmd: str, specs: list) -> None:
+    """
+    Validates OnCalendar strings with one 'systemd-analyze calendar' call.
+
+    Results are stored in _calendar_cache. systemd-analyze prints an
+    "Original form:" line on stdout for every expression it can parse and
+    reports the others on stderr, exiting non-zero if any of them failed.
+    """
+    pending = [
+        spec
+        for spec in dict.fromkeys(specs)
+        if spec and (systemd_analyze_cmd, spec) not in _calendar_cache
+    ]
+    if not pending:
+        return
+    # We add --iterations=1 to make it faster and avoid it hanging or producing too much output.
+    # stdout is only needed to tell several expressions apart on failure, and
+    # output is decoded only when something failed.
+    process = subprocess.run(
+        [systemd_analyze_cmd, "calendar", "--iterations=1", *pending],
+        stdout=subprocess.PIPE if len(pending) > 1 else subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=False,  # Do not raise exception on non-zero exit
+    )
+    if process.returncode == 0:
+        for spec in pending:
+            _calendar_cache[(systemd_analyze_cmd, spec)] = None
+        return
+    stderr_text = process.stderr.decode("utf-8", "replace").strip()
+    if len(pending) == 1:
+        _calendar_cache[(systemd_analyze_cmd, pending[0])] = stderr_text
+        return
+    parsed = {
+        line.split(":", 1)[1].strip()
+        for line in process.stdout.decode("utf-8", "replace").splitlines()
+        if line.strip().startswith("Original form:")
+    }
+    for spec in pending:
+        if spec in parsed:
+            _calendar_cache[(systemd_analyze_cmd, spec)] = None
+        else:
+            spec_errors = [
+                line for line in stderr_text.splitlines() if f"'{spec}'" in line
+            ]
+            _calendar_cache[(systemd_analyze_cmd, spec)] = (
+                "; ".join(spec_errors) or stderr_text
+            )
+
+
+def validate_calendar_expressions_batch(specs: list, setup_log_fh) -> dict:
+    """
+    Validates several Systemd OnCalendar strings in a single subprocess.
+
+    Args:
+        specs: The OnCalendar strings to validate.
+        setup_log_fh: File handle for logging.
+
+    Returns:
+        A dict mapping each validated string to True (valid) or False (invalid).
+        Empty strings, and all strings when 'systemd-analyze' is unavailable
+        or fails to run, are left out; validate_calendar_expression reports
+        those individually.
+    """
+    systemd_analyze_cmd = _which("systemd-analyze")
+    if not systemd_analyze_cmd:
+        return {}
+    try:
+        _run_calendar_validation(systemd_analyze_cmd, specs)
+    except Exception as e:
+        _setup_print_and_log(
+            f"WARNING: Batch validation of calendar expressions failed: {e}",
+            setup_log_fh,
+            console_out=False,
+        )
+    return {
+        spec: _calendar_cache[(systemd_analyze_cmd, spec)] is None
+        for spec in specs
+        if (systemd_analyze_cmd, spec) in _calendar_cache
+    }
+
+
 def validate_calendar_expression(
     calendar_str: str, setup_log_fh, default_fallback_expr: str
 ) -> str:
@@ -169,7 +304,7 @@ def validate_calendar_expression(
         )
         return default_fallback_expr
 
-    systemd_analyze_cmd = shutil.which("systemd-analyze")
+    systemd_analyze_cmd = _which("systemd-analyze")
     if not systemd_analyze_cmd:
         _setup_print_and_log(
             "WARNING: 'systemd-analyze' command not found. Cannot validate OnCalendar expressions. "
@@ -181,14 +316,9 @@ def validate_calendar_expression(
         return default_fallback_expr
 
     try:
-        # We add --iterations=1 to make it faster and avoid it hanging or producing too much output.
-        process = subprocess.run(
-            [systemd_analyze_cmd, "calendar", "--iterations=1", calendar_str],
-            capture_output=True,
-            text=True,
-            check=False,  # Do not raise exception on non-zero exit
-        )
-        if process.returncode == 0:
+        _run_calendar_validation(systemd_analyze_cmd, [calendar_str])
+        error_text = _calendar_cache[(systemd_analyze_cmd, calendar_str)]
+        if error_text is None:
             _setup_print_and_log(
                 f"Calendar expression '{calendar_str}' validated successfully.",
                 setup_log_fh,
@@ -198,7 +328,7 @@ def validate_calendar_expression(
         else:
             _setup_print_and_log(
                 f"WARNING: Invalid Systemd OnCalendar expression: '{calendar_str}'. "
-                f"Error: {process.stderr.strip()}. Falling back to default: {default_fallback_expr}",
+                f"Error: {error_text}. Falling back to default: {default_fallback_expr}",
                 setup_log_fh,
             )
             return default_fallback_expr
@@ -218,12 +348,136 @@ def validate_calendar_expression(
         return default_fallback_expr
 
 
+def _unconfirmed_timers(systemctl_cmd: str, timers: list) -> list:
+    """
+    Returns the timers that systemd does not report as both enabled and active.
+
+    'systemctl is-enabled' and 'is-active' print one state line per unit, in
+    the order given. If either query cannot be run or its output does not line
+    up with the timers, every timer is treated as unconfirmed.
+    """
+    states = []
+    for query in ("is-enabled", "is-active"):
+        try:
+            result = subprocess.run(
+                [systemctl_cmd, query, *timers], capture_output=True, text=True
+            )
+        except OSError:
+            return list(timers)
+        lines = result.stdout.splitlines()
+        if len(lines) != len(timers):
+            return list(timers)
+        states.append([line.strip() for line in lines])
+    enabled_states, active_states = states
+    return [
+        timer
+        for timer, enabled, active in zip(timers, enabled_states, active_states)
+        if enabled != "enabled" or active != "active"
+    ]
+
+
+def _enable_systemd_timers(systemctl_cmd: str, timers: list):
+    """
+    Enables and starts timers with a single 'systemctl enable --now' call.
+
+    Args:
+        systemctl_cmd: Path to the systemctl executable.
+        timers: Names of the timer units to enable.
+
+    Returns:
+        A (failed_timers, error) tuple: the timers that could not be enabled
+        and the CalledProcessError raised, or ([], None) on success. The call
+        is one transaction, so after a failure each timer's state is queried
+        back from systemd; only timers confirmed enabled and active are left
+        out of failed_timers.
+    """
+    try:
+        subprocess.run(
+            [systemctl_cmd, "enable", "--now", *timers],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        return [], None
+    except subprocess.CalledProcessError as e:
+        return _unconfirmed_timers(systemctl_cmd, timers), e
+
+
 # Helper function for progress display
 def _update_progress_display(message: str, setup_log_fh):
     """Prints a progress message to console and log."""
     _setup_print_and_log(f"PROGRESS: {message}", setup_log_fh)
 
 
+def _write_file_at(dir_fd: int, filename: str, content: str) -> None:
+    """Writes content to filename relative to an already opened directory fd."""
+    fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644, dir_fd=dir_fd)
+    try:
+        data = memoryview(content.encode("utf-8"))
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+    finally:
+        os.close(fd)
+
+
+# Input validators used by _get_cli_input. Each takes the chosen value and
+# returns (normalized value, None) on success or (value, error message).
+def _validate_path_input(value: str):
+    if not value:
+        return value, "Error: Path cannot be empty. Please try again."
+    return value, None
+
+
+def _validate_email_input(value: str):
+    # Basic check for @, more robust validation can be added if needed
+    if not value:
+        return value, "Error: Email cannot be empty. Please try again."
+    if "@" not in value:
+        return value, "Error: Invalid email format. Please try again."
+    return value, None
+
+
+def _make_allowed_values_validator(allowed_values: list):
+    """Builds a case-insensitive membership check for allowed_values."""
+    allowed_upper = frozenset(val.upper() for val in allowed_values)
+    error_message = (
+        f"Error: Invalid input. Must be one of {', '.join(allowed_values)}. "
+        "Please try again."
+    )
+
+    def _validate_allowed_input(value: str):
+        if value.upper() not in allowed_upper:
+            return value, error_message
+        return value, None
+
+    return _validate_allowed_input
+
+
+def _validate_bool_input(value: str):
+    lowered = value.lower()
+    if lowered in ("y", "yes", "true", "1"):
+        return "True", None
+    if lowered in ("n", "no", "false", "0"):
+        return "False", None
+    return value, "Error: Please answer 'y' or 'n'. Please try again."
+
+
+def _validate_int_input(value: str):
+    try:
+        # Return as string to match configparser needs
+        return str(int(value)), None
+    except ValueError:
+        return value, "Error: Value must be an integer. Please try again."
+
+
+def _validate_non_negative_int_input(value: str):
+    value, error_message = _validate_int_input(value)
+    if not error_message and int(value) < 0:
+        return value, "Error: Value must be a non-negative integer. Please try again."
+    return value, error_message
+
+
 def _get_cli_input(
     prompt_text: str,
     default_value: str,
@@ -261,14 +515,32 @@ def _get_cli_input(
     Raises:
         SigintEncountered: If Ctrl+C is pressed during input.
     """
-    full_prompt = f"{prompt_text} "
+    prompt_parts = [f"{prompt_text} "]
     if info_text:
-        full_prompt += f"({info_text}) "
+        prompt_parts.append(f"({info_text}) ")
+    if allowed_values:
+        prompt_parts.append(f"[Allowed: {', '.join(allowed_values)}] ")
+    if is_bool:
+        prompt_parts.append("[y/n] ")
+    prompt_parts.append(f"(default: {default_value}): ")
+    full_prompt = "".join(prompt_parts)
+
+    # The checks depend only on the flags, so select them once per prompt
+    validators = []
+    if is_path:
+        validators.append(_validate_path_input)
+    if is_email:
+        validators.append(_validate_email_input)
     if allowed_values:
-        full_prompt += f"[Allowed: {', '.join(allowed_values)}] "
+        validators.append(_make_allowed_values_validator(allowed_values))
     if is_bool:
-        full_prompt += "[y/n] "
-    full_prompt += f"(default: {default_value}): "
+        validators.append(_validate_bool_input)
+    if is_int:
+        validators.append(
+            _validate_non_negative_int_input
+            if int_non_negative
+            else _validate_int_input
+        )
 
     while True:
         try:
@@ -276,80 +548,28 @@ def _get_cli_input(
                 full_prompt, setup_log_fh, is_prompt=True, console_out=True
             )  # Prompt always to console
             user_input_str = input().strip()
-            # Log raw input, but not to console
-            _setup_print_and_log(
-                f"User input for '{prompt_text}': '{user_input_str}' (raw)",
-                setup_log_fh,
-                console_out=False,
-            )
-
             chosen_value = user_input_str if user_input_str else default_value
-            # Log effective value, but not to console
-            _setup_print_and_log(
-                f"Effective value for '{prompt_text}': '{chosen_value}'",
-                setup_log_fh,
-                console_out=False,
-            )
-
-            if is_path and not chosen_value:
+            if _DEBUG_INPUT_TRACE:
+                # Log raw and effective input, but not to console
                 _setup_print_and_log(
-                    "Error: Path cannot be empty. Please try again.",
+                    f"User input for '{prompt_text}': '{user_input_str}' (raw)",
                     setup_log_fh,
-                    console_out=True,
-                )  # Errors to console
-                continue
-            if (
-                is_email
-            ):  # Basic check for @, more robust validation can be added if needed
-                if not chosen_value:
-                    _setup_print_and_log(
-                        "Error: Email cannot be empty. Please try again.",
-                        setup_log_fh,
-                        console_out=True,
-                    )  # Errors to console
-                    continue
-                if "@" not in chosen_value:
-                    _setup_print_and_log(
-                        "Error: Invalid email format. Please try again.",
-                        setup_log_fh,
-                        console_out=True,
-                    )  # Errors to console
-                    continue
-            if allowed_values and chosen_value.upper() not in [
-                val.upper() for val in allowed_values
-            ]:
+                    console_out=False,
+                )
                 _setup_print_and_log(
-                    f"Error: Invalid input. Must be one of {', '.join(allowed_values)}. Please try again.",
+                    f"Effective value for '{prompt_text}': '{chosen_value}'",
                     setup_log_fh,
+                    console_out=False,
                 )
+
+            error_message = None
+            for validator in validators:
+                chosen_value, error_message = validator(chosen_value)
+                if error_message:
+                    break
+            if error_message:
+                _setup_print_and_log(error_message, setup_log_fh)  # Errors to console
                 continue
-            if is_bool:
-                if chosen_value.lower() in ["y", "yes", "true", "1"]:
-                    return "True"
-                elif chosen_value.lower() in ["n", "no", "false", "0"]:
-                    return "False"
-                else:
-                    _setup_print_and_log(
-                        "Error: Please answer 'y' or 'n'. Please try again.",
-                        setup_log_fh,
-                    )
-                    continue
-            if is_int:
-                try:
-                    int_val = int(chosen_value)
-                    if int_non_negative and int_val < 0:
-                        _setup_print_and_log(
-                            "Error: Value must be a non-negative integer. Please try again.",
-                            setup_log_fh,
-                        )
-                        continue
-                    return str(int_val)  # Return as string to match configparser needs
-                except ValueError:
-                    _setup_print_and_log(
-                        "Error: Value must be an integer. Please try again.",
-                        setup_log_fh,
-                    )
-                    continue
 
             return chosen_value
         except KeyboardInterrupt:
@@ -368,6 +588,7 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
     )
     _setup_print_and_log("Press Ctrl+C at any time to abort.", setup_log_fh)
 
+    # Every value is stored as a string, as configparser expects
     default_config_values = {
         "paths": {
             "working_dir": str(DEFAULT_WORKING_DIR),
@@ -378,7 +599,7 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
         "report": {
             "email": "security-team@example.org",
             "subject_prefix": "[MailLogSentinel]",
-            "sender_override": f"{getpass.getuser()}@localhost",
+            "sender_override": f"{_cached_getuser()}@localhost",
         },
         "geolocation": {
             "country_db_path": str(DEFAULT_COUNTRY_DB_PATH),
@@ -408,7 +629,10 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
             "frequency": "*:0/5",
         },
     }
-    collected_config = copy.deepcopy(default_config_values)
+    # Values are plain strings, so copying each section dict is enough
+    collected_config = {
+        section: dict(options) for section, options in default_config_values.items()
+    }
     sections_to_configure = [
         "paths",
         "report",
@@ -429,7 +653,18 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
                 setup_log_fh,
             )
             if section_name in default_config_values:
+                skipped_keys = _NON_INTERACTIVE_KEYS.get(section_name, {})
                 for key, default_value in default_config_values[section_name].items():
+                    if key in skipped_keys:
+                        # collected_config already holds the default value.
+                        # Quote empty values so they stay visible in the log.
+                        shown_value = default_value or "''"
+                        _setup_print_and_log(
+                            f"  Set [{section_name}] {key} = {shown_value} ({skipped_keys[key]})",
+                            setup_log_fh,
+                            console_out=False,
+                        )
+                        continue
                     prompt_text = f"Enter {key.replace('_', ' ')} for '{section_name}'"
                     (
                         info_text,
@@ -453,15 +688,6 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
                                 "Must be an existing email on this server if used."
                             )
                     elif section_name in ["geolocation", "ASN_ASO"]:
-                        if key.endswith("_url"):
-                            # URLs are not configurable, skip prompt and use default.
-                            collected_config[section_name][key] = str(default_value)
-                            _setup_print_and_log(
-                                f"  Set [{section_name}] {key} = {str(default_value)} (default, not configurable)",
-                                setup_log_fh,
-                                console_out=False,
-                            )
-                            continue  # Skip to next key
                         if key.endswith("_path"):
                             is_a_path = True
                             info_text = "Path for local DB copy. Recommended: default suggestions"  # Updated info text
@@ -480,27 +706,9 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
                             is_an_int = True
                             is_nn_int = True
                     elif section_name == "sqlite_database":
-                        if key == "db_type":
-                            # Fixed for now, so skip prompt and use default.
-                            collected_config[section_name][key] = str(default_value)
-                            _setup_print_and_log(
-                                f"  Set [{section_name}] {key} = {str(default_value)} (fixed to sqlite3 for now)",
-                                setup_log_fh,
-                                console_out=False,
-                            )
-                            continue  # Skip to next key
-                        elif key == "db_path":
+                        if key == "db_path":
                             is_a_path = True
                             info_text = "Path to the SQLite database file."
-                        elif key in ["user", "password_hash", "salt"]:
-                            # Not used for SQLite, skip prompt and use default (empty).
-                            collected_config[section_name][key] = str(default_value)
-                            _setup_print_and_log(
-                                f"  Set [{section_name}] {key} = '{str(default_value)}' (not used for SQLite)",
-                                setup_log_fh,
-                                console_out=False,
-                            )
-                            continue  # Skip to next key
                     elif section_name == "sql_export_systemd":
                         if key == "frequency":
                             info_text = "Systemd OnCalendar format only (e.g., *:0/4, hourly, 08:30)."
@@ -508,10 +716,9 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
                         if key == "frequency":
                             info_text = "Systemd OnCalendar format only (e.g., *:0/5, 02:00)."
 
-                    # Only call _get_cli_input if not skipped above
                     user_input_str = _get_cli_input(
                         prompt_text,
-                        str(default_value),
+                        default_value,
                         setup_log_fh,
                         info_text,
                         is_path=is_a_path,
@@ -525,18 +732,12 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
                     processed_value = user_input_str
                     if section_name == "general" and key == "log_level":
                         processed_value = user_input_str.upper()
-                    elif section_name == "sql_export_systemd" and key == "frequency":
-                        processed_value = validate_calendar_expression(
-                            user_input_str, setup_log_fh, "*:0/4" # Default fallback for export
-                        )
-                    elif section_name == "sql_import_systemd" and key == "frequency":
-                        processed_value = validate_calendar_expression(
-                            user_input_str, setup_log_fh, "*:0/5" # Default fallback for import
-                        )
+                    # SQL export/import frequencies are validated together with
+                    # the other schedules below.
 
-                    collected_config[section_name][key] = str(processed_value)
+                    collected_config[section_name][key] = processed_value
                     _setup_print_and_log(
-                        f"  Set [{section_name}] {key} = {str(processed_value)}",
+                        f"  Set [{section_name}] {key} = {processed_value}",
                         setup_log_fh,
                         console_out=False,
                     )  # Log only
@@ -552,44 +753,18 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
             setup_log_fh,
             info_text="Systemd OnCalendar format or keywords like hourly, daily.",
         )
-        extraction_schedule_str = validate_calendar_expression(
-            extraction_schedule_str, setup_log_fh, "hourly"
+        raw_report_time_str = _get_cli_input(
+            "Daily report OnCalendar value (e.g., '08:50', 'daily', '*-*-* HH:MM:SS')",
+            "daily", # Default input to _get_cli_input
+            setup_log_fh,
+            info_text="Systemd OnCalendar format.",
         )
-
-        while True:
-            raw_report_time_str = _get_cli_input(
-                "Daily report OnCalendar value (e.g., '08:50', 'daily', '*-*-* HH:MM:SS')",
-                "daily", # Default input to _get_cli_input
-                setup_log_fh,
-                info_text="Systemd OnCalendar format.",
-            )
-            # Validate the raw input first
-            validated_report_time_str = validate_calendar_expression(
-                raw_report_time_str, setup_log_fh, "daily" # Fallback for validation
-            )
-
-            if re.fullmatch(r"\d{2}:\d{2}", validated_report_time_str):
-                h, m = map(int, validated_report_time_str.split(":"))
-                report_on_calendar_formatted = f"*-*-* {h:02d}:{m:02d}:00"
-                break
-            elif validated_report_time_str.lower() == "daily":
-                report_on_calendar_formatted = "*-*-* 23:59:59" # Systemd 'daily' often means midnight
-                break
-            else:
-                # If already validated and not HH:MM or 'daily', use as is
-                # (assuming it's a more complex valid OnCalendar string)
-                report_on_calendar_formatted = validated_report_time_str
-                break
-
         ip_update_schedule_str = _get_cli_input(
             "IP DB update frequency (e.g., 'daily', '0 2 * * 1')",
             "daily",
             setup_log_fh,
             info_text="Systemd OnCalendar format.",
         )
-        ip_update_schedule_str = validate_calendar_expression(
-            ip_update_schedule_str, setup_log_fh, "daily"
-        )
 
         # Get SQL export and import schedules
         sql_export_schedule_str = _get_cli_input(
@@ -598,19 +773,49 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
             setup_log_fh,
             info_text="Systemd OnCalendar format only (e.g., *:0/4, hourly, 08:30).",
         )
-        sql_export_schedule_str = validate_calendar_expression(
-            sql_export_schedule_str, setup_log_fh, "*:0/4"
-        )
-        collected_config["sql_export_systemd"][
-            "frequency"
-        ] = sql_export_schedule_str  # Update collected config
-
         sql_import_schedule_str = _get_cli_input(
             "SQL import frequency",
             collected_config["sql_import_systemd"]["frequency"],  # Default from config
             setup_log_fh,
             info_text="Systemd OnCalendar format only (e.g., *:0/5, 02:00).",
         )
+
+        # Validate every schedule with a single systemd-analyze run; the calls
+        # below then only log the outcome and apply fallbacks.
+        validate_calendar_expressions_batch(
+            [
+                extraction_schedule_str,
+                raw_report_time_str,
+                ip_update_schedule_str,
+                sql_export_schedule_str,
+                sql_import_schedule_str,
+            ],
+            setup_log_fh,
+        )
+        extraction_schedule_str = validate_calendar_expression(
+            extraction_schedule_str, setup_log_fh, "hourly"
+        )
+        validated_report_time_str = validate_calendar_expression(
+            raw_report_time_str, setup_log_fh, "daily" # Fallback for validation
+        )
+        if HHMM_RE.fullmatch(validated_report_time_str):
+            h, m = map(int, validated_report_time_str.split(":"))
+            report_on_calendar_formatted = f"*-*-* {h:02d}:{m:02d}:00"
+        elif validated_report_time_str.lower() == "daily":
+            report_on_calendar_formatted = "*-*-* 23:59:59" # Systemd 'daily' often means midnight
+        else:
+            # If already validated and not HH:MM or 'daily', use as is
+            # (assuming it's a more complex valid OnCalendar string)
+            report_on_calendar_formatted = validated_report_time_str
+        ip_update_schedule_str = validate_calendar_expression(
+            ip_update_schedule_str, setup_log_fh, "daily"
+        )
+        sql_export_schedule_str = validate_calendar_expression(
+            sql_export_schedule_str, setup_log_fh, "*:0/4"
+        )
+        collected_config["sql_export_systemd"][
+            "frequency"
+        ] = sql_export_schedule_str  # Update collected config
         sql_import_schedule_str = validate_calendar_expression(
             sql_import_schedule_str, setup_log_fh, "*:0/5"
         )
@@ -618,7 +823,7 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
             "frequency"
         ] = sql_import_schedule_str  # Update collected config
 
-        suggested_user = os.environ.get("SUDO_USER", getpass.getuser())
+        suggested_user = os.environ.get("SUDO_USER") or _cached_getuser()
         suggested_user = (
             "your_non_root_user" if suggested_user == "root" else suggested_user
         )
@@ -638,44 +843,43 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
                     setup_log_fh,
                 )
                 continue
+            # Failed lookups are not cached: the admin may create the user in
+            # another shell and enter the same name again.
             try:
-                pwd.getpwnam(run_as_user)
+                _cached_getpwnam(run_as_user)
                 break
             except KeyError:
-                _setup_print_and_log(
-                    f"Error: User '{run_as_user}' not found on this system. Please create it first or use an existing non-root user.",
-                    setup_log_fh,
-                )
+                pass
+            _setup_print_and_log(
+                f"Error: User '{run_as_user}' not found on this system. Please create it first or use an existing non-root user.",
+                setup_log_fh,
+            )
 
         _setup_print_and_log("\n--- Configuration Review ---", setup_log_fh)
-        parser_display = configparser.ConfigParser()
+        # Built once: shown for review, then saved once confirmed
+        parser_save = configparser.ConfigParser()
         for s_name, s_options in collected_config.items():
-            parser_display.add_section(s_name)
+            parser_save.add_section(s_name)
             for k, v_val in s_options.items():
-                parser_display.set(s_name, k, str(v_val))
-
-        _setup_print_and_log("Collected Configuration:", setup_log_fh)
-        for section in parser_display.sections():
-            _setup_print_and_log(f"[{section}]", setup_log_fh)
-            for key, value in parser_display.items(section):
-                _setup_print_and_log(f"  {key} = {value}", setup_log_fh)
-        _setup_print_and_log("[Systemd]", setup_log_fh)
-        _setup_print_and_log(
-            f"  extraction_schedule = {extraction_schedule_str}", setup_log_fh
-        )
-        _setup_print_and_log(
-            f"  report_on_calendar = {report_on_calendar_formatted}", setup_log_fh
-        )
-        _setup_print_and_log(
-            f"  ip_update_schedule = {ip_update_schedule_str}", setup_log_fh
-        )
-        _setup_print_and_log(
-            f"  sql_export_schedule = {sql_export_schedule_str}", setup_log_fh
-        )
-        _setup_print_and_log(
-            f"  sql_import_schedule = {sql_import_schedule_str}", setup_log_fh
-        )
-        _setup_print_and_log(f"  run_as_user = {run_as_user}", setup_log_fh)
+                parser_save.set(s_name, k, v_val)
+
+        # Emit the whole review with one console/log write
+        review_lines = ["Collected Configuration:"]
+        for section in parser_save.sections():
+            review_lines.append(f"[{section}]")
+            review_lines.extend(
+                f"  {key} = {value}" for key, value in parser_save.items(section)
+            )
+        review_lines += [
+            "[Systemd]",
+            f"  extraction_schedule = {extraction_schedule_str}",
+            f"  report_on_calendar = {report_on_calendar_formatted}",
+            f"  ip_update_schedule = {ip_update_schedule_str}",
+            f"  sql_export_schedule = {sql_export_schedule_str}",
+            f"  sql_import_schedule = {sql_import_schedule_str}",
+            f"  run_as_user = {run_as_user}",
+        ]
+        _setup_print_and_log("\n".join(review_lines), setup_log_fh)
 
         confirm = _get_cli_input(
             "\nSave this configuration and proceed with setup?",
@@ -690,12 +894,6 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
             return False
 
         _update_progress_display("Saving configuration file...", setup_log_fh)
-        parser_save = configparser.ConfigParser()
-        for s, o in collected_config.items():
-            parser_save.add_section(s)
-            for k, v in o.items():
-                parser_save.set(s, k, str(v))
-
         # Add User and systemd sections for use by non_interactive_setup and other functions
         if not parser_save.has_section("User"):
             parser_save.add_section("User")
@@ -769,12 +967,12 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
             return True  # Core config done, but with caveats
 
         _update_progress_display("Generating Systemd unit files...", setup_log_fh)
-        python_exec = shutil.which("python3") or "/usr/bin/python3"
+        python_exec = _which("python3") or "/usr/bin/python3"
         script_main_path = (
-            shutil.which("maillogsentinel.py") or "/usr/local/bin/maillogsentinel.py"
+            _which("maillogsentinel.py") or "/usr/local/bin/maillogsentinel.py"
         )
         ipinfo_script_path_sysd = (
-            shutil.which("ipinfo.py") or "/usr/local/bin/ipinfo.py"
+            _which("ipinfo.py") or "/usr/local/bin/ipinfo.py"
         )
 
         units_content = _generate_systemd_units_content(
@@ -802,22 +1000,30 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
             _update_progress_display("Installing Systemd unit files...", setup_log_fh)
             systemd_dir = Path("/etc/systemd/system/")
             systemd_dir.mkdir(parents=True, exist_ok=True)
-            for unit_filename, content in units_content.items():
-                unit_path = systemd_dir / unit_filename
-                # Basic backup for systemd files if they exist
-                if unit_path.exists():
-                    backup_unit_path = (
-                        unit_path.parent / f"{unit_path.name}.backup_{ts_backup}"
-                    )
-                    _setup_print_and_log(
-                        f"Backing up existing systemd unit {unit_path} to {backup_unit_path}",
-                        setup_log_fh,
-                    )
-                    shutil.move(str(unit_path), str(backup_unit_path))  # Move, not copy
-                    backed_up_items.append((str(backup_unit_path), str(unit_path)))
-                unit_path.write_text(content)
-                created_final_paths.append(str(unit_path))
-                _setup_print_and_log(f"  Installed {unit_filename}", setup_log_fh)
+            # Resolve the systemd directory once and create every unit
+            # relative to it instead of walking the full path per file.
+            systemd_dir_fd = os.open(str(systemd_dir), os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                for unit_filename, content in units_content.items():
+                    unit_path = systemd_dir / unit_filename
+                    # Basic backup for systemd files if they exist
+                    if unit_path.exists():
+                        backup_unit_path = (
+                            unit_path.parent / f"{unit_path.name}.backup_{ts_backup}"
+                        )
+                        _setup_print_and_log(
+                            f"Backing up existing systemd unit {unit_path} to {backup_unit_path}",
+                            setup_log_fh,
+                        )
+                        shutil.move(
+                            str(unit_path), str(backup_unit_path)
+                        )  # Move, not copy
+                        backed_up_items.append((str(backup_unit_path), str(unit_path)))
+                    _write_file_at(systemd_dir_fd, unit_filename, content)
+                    created_final_paths.append(str(unit_path))
+                    _setup_print_and_log(f"  Installed {unit_filename}", setup_log_fh)
+            finally:
+                os.close(systemd_dir_fd)
             systemd_files_installed_flag = True
         else:
             _setup_print_and_log(
@@ -859,7 +1065,7 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
                 f"Adding user {run_as_user} to 'adm' group (if not already a member)...",
                 setup_log_fh,
             )
-            usermod_cmd_path = shutil.which("usermod")
+            usermod_cmd_path = _which("usermod")
             if usermod_cmd_path:
                 usermod_proc = subprocess.run(
                     [usermod_cmd_path, "-aG", "adm", run_as_user],
@@ -882,7 +1088,7 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
                 )
 
             if systemd_files_installed_flag:
-                systemctl_cmd_path = shutil.which("systemctl")
+                systemctl_cmd_path = _which("systemctl")
                 if systemctl_cmd_path:
                     _update_progress_display(
                         "Reloading systemd daemon...", setup_log_fh
@@ -901,11 +1107,13 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
                         _setup_print_and_log(
                             f"  ERROR: systemctl daemon-reload failed: {e_ctl.stderr}",
                             setup_log_fh,
+                            flush=True,
                         )
 
                     _update_progress_display(
                         "Enabling and starting Systemd timers...", setup_log_fh
                     )
+                    present_timers = []
                     for timer_name in [
                         "maillogsentinel-extract.timer",
                         "maillogsentinel-report.timer",
@@ -914,26 +1122,27 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
                         "maillogsentinel-sql-import.timer",  # New
                     ]:
                         if (Path("/etc/systemd/system") / timer_name).exists():
-                            try:
-                                subprocess.run(
-                                    [systemctl_cmd_path, "enable", "--now", timer_name],
-                                    check=True,
-                                    capture_output=True,
-                                    text=True,
-                                )
-                                _setup_print_and_log(
-                                    f"  Enabled and started {timer_name}.", setup_log_fh
-                                )
-                            except subprocess.CalledProcessError as e_ctl_timer:
-                                _setup_print_and_log(
-                                    f"  ERROR: Failed to enable/start {timer_name}: {e_ctl_timer.stderr}",
-                                    setup_log_fh,
-                                )
+                            present_timers.append(timer_name)
                         else:
                             _setup_print_and_log(
                                 f"  Timer {timer_name} not found in /etc/systemd/system, skipping enable/start.",
                                 setup_log_fh,
                             )
+                    if present_timers:
+                        failed_timers, e_ctl_timer = _enable_systemd_timers(
+                            systemctl_cmd_path, present_timers
+                        )
+                        for timer_name in present_timers:
+                            if timer_name in failed_timers:
+                                _setup_print_and_log(
+                                    f"  ERROR: Failed to enable/start {timer_name}: {e_ctl_timer.stderr}",
+                                    setup_log_fh,
+                                    flush=True,
+                                )
+                            else:
+                                _setup_print_and_log(
+                                    f"  Enabled and started {timer_name}.", setup_log_fh
+                                )
                 else:
                     _setup_print_and_log(
                         "  'systemctl' command not found. Systemd operations skipped.",
@@ -951,13 +1160,17 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
         _setup_print_and_log(
             f"Configuration file is at: {target_config_path}", setup_log_fh
         )
-        _setup_print_and_log("Please review the setup log for details.", setup_log_fh)
+        _setup_print_and_log(
+            "Please review the setup log for details.", setup_log_fh, flush=True
+        )
         if os.geteuid() == 0 and systemd_files_installed_flag:
-            _setup_print_and_log("Systemd timers should now be active.", setup_log_fh)
+            _setup_print_and_log(
+                "Systemd timers should now be active.", setup_log_fh, flush=True
+            )
 
     except SigintEncountered:
         _setup_print_and_log(
-            "\nUser interrupted interactive setup (Ctrl+C).", setup_log_fh
+            "\nUser interrupted interactive setup (Ctrl+C).", setup_log_fh, flush=True
         )
         raise  # Re-raise to be caught by main_setup's handler for cleanup
     except Exception as e_main_interactive:
@@ -968,6 +1181,7 @@ def interactive_cli_setup(target_config_path, setup_log_fh):
         _setup_print_and_log(
             f"FATAL ERROR during interactive setup: {e_main_interactive.__class__.__name__}: {e_main_interactive}",
             setup_log_fh,
+            flush=True,
         )
         # import traceback # No longer needed
 
@@ -986,13 +1200,13 @@ def non_interactive_setup(source_config_path: Path, setup_log_fh):
     The target system configuration path is DEFAULT_CONFIG_PATH_SETUP.
     Updates global backed_up_items and created_final_paths lists.
     """
-    import sys  # Ensure sys is imported for stdout
-
     print("non_interactive_setup CALLED", flush=True)
     # traceback.print_stack(file=sys.stdout, limit=10) # Removed for debugging
     print("---", flush=True)
 
     _setup_print_and_log("--- MailLogSentinel Non-Interactive Setup ---", setup_log_fh)
+    # One suffix for every backup made by this run
+    ts_backup = datetime.now().strftime("%Y%m%d%H%M%S")
 
     if os.geteuid() != 0:
         _setup_print_and_log(
@@ -1060,9 +1274,8 @@ def non_interactive_setup(source_config_path: Path, setup_log_fh):
         f"Target system configuration file: {target_config_file}", setup_log_fh
     )
     if target_config_file.exists():
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
         backup_config_path = (
-            target_config_file.parent / f"{target_config_file.name}.backup_{timestamp}"
+            target_config_file.parent / f"{target_config_file.name}.backup_{ts_backup}"
         )
         try:
             shutil.move(str(target_config_file), str(backup_config_path))
@@ -1101,8 +1314,7 @@ def non_interactive_setup(source_config_path: Path, setup_log_fh):
 
     for dir_path, dir_name in [(working_dir, "working"), (state_dir, "state")]:
         if dir_path.exists():
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            backup_dir_path = dir_path.parent / f"{dir_path.name}.backup_{timestamp}"
+            backup_dir_path = dir_path.parent / f"{dir_path.name}.backup_{ts_backup}"
             try:
                 shutil.move(str(dir_path), str(backup_dir_path))
                 _setup_print_and_log(
@@ -1157,7 +1369,7 @@ def non_interactive_setup(source_config_path: Path, setup_log_fh):
         f"Attempting to add user '{run_as_user}' to group '{adm_group}'...",
         setup_log_fh,
     )
-    usermod_cmd = shutil.which("usermod")
+    usermod_cmd = _which("usermod")
     if not usermod_cmd:
         _setup_print_and_log("ERROR: 'usermod' not found.", setup_log_fh)
         sys.exit(1)  # Restored error
@@ -1185,9 +1397,9 @@ def non_interactive_setup(source_config_path: Path, setup_log_fh):
     _change_ownership(str(state_dir), run_as_user, setup_log_fh)
 
     _setup_print_and_log("Generating Systemd unit files...", setup_log_fh)
-    python_executable = shutil.which("python3") or "/usr/bin/python3"
+    python_executable = _which("python3") or "/usr/bin/python3"
     script_path_for_systemd = (
-        shutil.which("maillogsentinel.py") or "/usr/local/bin/maillogsentinel.py"
+        _which("maillogsentinel.py") or "/usr/local/bin/maillogsentinel.py"
     )
     if not Path(
         script_path_for_systemd
@@ -1201,13 +1413,13 @@ def non_interactive_setup(source_config_path: Path, setup_log_fh):
     report_on_calendar = config.get("systemd", "report_schedule", fallback="daily")
     if report_on_calendar.lower() == "daily":
         report_on_calendar = "*-*-* 23:59:00"
-    elif re.fullmatch(r"\d{2}:\d{2}", report_on_calendar):
+    elif HHMM_RE.fullmatch(report_on_calendar):
         h, m = map(int, report_on_calendar.split(":"))
         report_on_calendar = f"*-*-* {h:02d}:{m:02d}:00"
     ip_update_schedule_str = config.get(
         "systemd", "ip_update_schedule", fallback="daily"
     )
-    ipinfo_script_path = shutil.which("ipinfo.py") or "/usr/local/bin/ipinfo.py"
+    ipinfo_script_path = _which("ipinfo.py") or "/usr/local/bin/ipinfo.py"
     if not Path(ipinfo_script_path).is_file() and not ipinfo_script_path.startswith(
         "/usr/local/bin"
     ):
@@ -1219,12 +1431,23 @@ def non_interactive_setup(source_config_path: Path, setup_log_fh):
     sql_export_schedule_str = config.get(
         "sql_export_systemd", "frequency", fallback="*:0/4"
     )
-    sql_export_schedule_str = validate_calendar_expression(
-        sql_export_schedule_str, setup_log_fh, "*:0/4"
-    )
     sql_import_schedule_str = config.get(
         "sql_import_systemd", "frequency", fallback="*:0/5"
     )
+    # One systemd-analyze run for all schedules; the calls below reuse it.
+    validate_calendar_expressions_batch(
+        [
+            sql_export_schedule_str,
+            sql_import_schedule_str,
+            extraction_schedule_str,
+            report_on_calendar,
+            ip_update_schedule_str,
+        ],
+        setup_log_fh,
+    )
+    sql_export_schedule_str = validate_calendar_expression(
+        sql_export_schedule_str, setup_log_fh, "*:0/4"
+    )
     sql_import_schedule_str = validate_calendar_expression(
         sql_import_schedule_str, setup_log_fh, "*:0/5"
     )
@@ -1272,31 +1495,32 @@ def non_interactive_setup(source_config_path: Path, setup_log_fh):
         systemd_dir_path.mkdir(
             parents=True, exist_ok=True
         )  # Ensure systemd dir exists before moving
-        for filename in unit_files_content.keys():
+        # Each backup and install is recorded right after its move, so a
+        # Ctrl+C between units can still roll back everything done so far.
+        for filename in unit_files_content:
             final_file_path = systemd_dir_path / filename
             if final_file_path.exists():
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
                 backup_unit_path = (
                     final_file_path.parent
-                    / f"{final_file_path.name}.backup_{timestamp}"
+                    / f"{final_file_path.name}.backup_{ts_backup}"
                 )
                 try:
                     shutil.move(str(final_file_path), str(backup_unit_path))
+                    backed_up_items.append(
+                        (str(backup_unit_path), str(final_file_path))
+                    )
                     _setup_print_and_log(
                         f"Backed up {final_file_path} to {backup_unit_path}",
                         setup_log_fh,
                     )
-                    backed_up_items.append(
-                        (str(backup_unit_path), str(final_file_path))
-                    )
                 except Exception as e:
                     _setup_print_and_log(
                         f"ERROR backing up {final_file_path}: {e}", setup_log_fh
                     )
             try:
                 shutil.move(str(temp_dir / filename), str(final_file_path))
-                _setup_print_and_log(f"Installed {final_file_path}", setup_log_fh)
                 created_final_paths.append(str(final_file_path))
+                _setup_print_and_log(f"Installed {final_file_path}", setup_log_fh)
             except Exception as e:
                 _setup_print_and_log(
                     f"ERROR installing {final_file_path}: {e}", setup_log_fh
@@ -1307,7 +1531,7 @@ def non_interactive_setup(source_config_path: Path, setup_log_fh):
     _setup_print_and_log(
         "Reloading systemd daemon and enabling timers...", setup_log_fh
     )
-    systemctl_cmd = shutil.which("systemctl")
+    systemctl_cmd = _which("systemctl")
     if not systemctl_cmd:
         _setup_print_and_log("ERROR: 'systemctl' not found.", setup_log_fh)
         sys.exit(1)  # Restored error
@@ -1337,37 +1561,56 @@ def non_interactive_setup(source_config_path: Path, setup_log_fh):
         "maillogsentinel-sql-export.timer",  # New
         "maillogsentinel-sql-import.timer",  # New
     ]
+    present_timers = []
     for timer in timers_to_enable:
         if not (systemd_dir_path / timer).exists():
             _setup_print_and_log(
                 f"WARN: Timer {timer} not found, skip enable.", setup_log_fh
             )
             continue
+        present_timers.append(timer)
+    if present_timers:
         try:
-            subprocess.run(
-                [systemctl_cmd, "enable", "--now", timer],
-                check=True,
-                capture_output=True,
-                text=True,
-            )
-            _setup_print_and_log(f"Enabled/started {timer}", setup_log_fh)
-        except subprocess.CalledProcessError as e:
-            error_detail = f"Stderr: {e.stderr.strip()}" if e.stderr else "No stderr."
-            _setup_print_and_log(
-                f"ERROR: 'systemctl enable --now {timer}' failed: {e}. {error_detail}",
-                setup_log_fh,
+            failed_timers, error = _enable_systemd_timers(
+                systemctl_cmd, present_timers
             )
-            sys.exit(1)
         except Exception as e:  # Catch other exceptions
             _setup_print_and_log(
-                f"ERROR: 'systemctl enable --now {timer}' failed with an unexpected error: {e}",
+                f"ERROR: 'systemctl enable --now {' '.join(present_timers)}' failed with an unexpected error: {e}",
                 setup_log_fh,
             )
             sys.exit(1)
+        for timer in present_timers:
+            if timer in failed_timers:
+                error_detail = (
+                    f"Stderr: {error.stderr.strip()}" if error.stderr else "No stderr."
+                )
+                _setup_print_and_log(
+                    f"ERROR: 'systemctl enable --now {timer}' failed: {error}. {error_detail}",
+                    setup_log_fh,
+                )
+            else:
+                _setup_print_and_log(f"Enabled/started {timer}", setup_log_fh)
+        if failed_timers:
+            sys.exit(1)
 
     _setup_print_and_log("--- Non-Interactive Setup Completed ---", setup_log_fh)
 
 
+# Templates shared by every generated service/timer pair
+_SERVICE_UNIT_TEMPLATE = (
+    "[Unit]\nDescription={description}\nAfter=network.target\n\n"
+    "[Service]\nType=oneshot\nUser={user}\nExecStart={exec_start}\n"
+    "{working_directory_line}StandardOutput=journal\nStandardError=journal\n\n"
+    "[Install]\nWantedBy=multi-user.target\n"
+)
+_TIMER_UNIT_TEMPLATE = (
+    "[Unit]\nDescription={description}\n\n"
+    "[Timer]\nUnit={service}\nOnCalendar={on_calendar}\nPersistent=true\n\n"
+    "[Install]\nWantedBy=timers.target\n"
+)
+
+
 def _generate_systemd_units_content(
     run_as_user,
     python_exec,
@@ -1384,33 +1627,78 @@ def _generate_systemd_units_content(
     _setup_print_and_log(
         f"Generating systemd units with user={run_as_user}, script={script_path}", None
     )
-    maillogsentinel_service_content = f"""[Unit]\nDescription=MailLogSentinel Log Extraction Service\nAfter=network.target\n\n[Service]\nType=oneshot\nUser={run_as_user}\nExecStart={python_exec} {script_path} --config {config_path}\nWorkingDirectory={work_dir}\nStandardOutput=journal\nStandardError=journal\n\n[Install]\nWantedBy=multi-user.target\n"""
-    maillogsentinel_extract_timer_content = f"""[Unit]\nDescription=Run MailLogSentinel Log Extraction periodically\n\n[Timer]\nUnit=maillogsentinel.service\nOnCalendar={extract_sched}\nPersistent=true\n\n[Install]\nWantedBy=timers.target\n"""
-    maillogsentinel_report_service_content = f"""[Unit]\nDescription=MailLogSentinel Daily Report Service\nAfter=network.target\n\n[Service]\nType=oneshot\nUser={run_as_user}\nExecStart={python_exec} {script_path} --config {config_path} --report\nWorkingDirectory={work_dir}\nStandardOutput=journal\nStandardError=journal\n\n[Install]\nWantedBy=multi-user.target\n"""
-    maillogsentinel_report_timer_content = f"""[Unit]\nDescription=Run MailLogSentinel Daily Report\n\n[Timer]\nUnit=maillogsentinel-report.service\nOnCalendar={report_sched}\nPersistent=true\n\n[Install]\nWantedBy=timers.target\n"""
-    ipinfo_update_service_content = f"""[Unit]\nDescription=Service to update IP DBs for MailLogSentinel\nAfter=network.target\n\n[Service]\nType=oneshot\nUser={run_as_user}\nExecStart={python_exec} {ipinfo_script_path} --update --config {config_path}\nStandardOutput=journal\nStandardError=journal\n\n[Install]\nWantedBy=multi-user.target\n"""
-    ipinfo_update_timer_content = f"""[Unit]\nDescription=Timer to update IP DBs\n\n[Timer]\nUnit=ipinfo-update.service\nOnCalendar={ip_update_sched}\nPersistent=true\n\n[Install]\nWantedBy=timers.target\n"""
-
-    # New SQL Export units
-    maillogsentinel_sql_export_service_content = f"""[Unit]\nDescription=MailLogSentinel SQL Export Service\nAfter=network.target\n\n[Service]\nType=oneshot\nUser={run_as_user}\nExecStart={python_exec} {script_path} --config {config_path} --sql-export\nWorkingDirectory={work_dir}\nStandardOutput=journal\nStandardError=journal\n\n[Install]\nWantedBy=multi-user.target\n"""
-    maillogsentinel_sql_export_timer_content = f"""[Unit]\nDescription=Run MailLogSentinel SQL Export periodically\n\n[Timer]\nUnit=maillogsentinel-sql-export.service\nOnCalendar={sql_export_schedule}\nPersistent=true\n\n[Install]\nWantedBy=timers.target\n"""
-
-    # New SQL Import units
-    maillogsentinel_sql_import_service_content = f"""[Unit]\nDescription=MailLogSentinel SQL Import Service\nAfter=network.target\n\n[Service]\nType=oneshot\nUser={run_as_user}\nExecStart={python_exec} {script_path} --config {config_path} --sql-import\nWorkingDirectory={work_dir}\nStandardOutput=journal\nStandardError=journal\n\n[Install]\nWantedBy=multi-user.target\n"""
-    maillogsentinel_sql_import_timer_content = f"""[Unit]\nDescription=Run MailLogSentinel SQL Import periodically\n\n[Timer]\nUnit=maillogsentinel-sql-import.service\nOnCalendar={sql_import_schedule}\nPersistent=true\n\n[Install]\nWantedBy=timers.target\n"""
+    main_exec = f"{python_exec} {script_path} --config {config_path}"
+    work_dir_line = f"WorkingDirectory={work_dir}\n"
+    # (service, timer, service description, timer description, ExecStart,
+    #  WorkingDirectory line, OnCalendar)
+    units = [
+        (
+            "maillogsentinel.service",
+            "maillogsentinel-extract.timer",
+            "MailLogSentinel Log Extraction Service",
+            "Run MailLogSentinel Log Extraction periodically",
+            main_exec,
+            work_dir_line,
+            extract_sched,
+        ),
+        (
+            "maillogsentinel-report.service",
+            "maillogsentinel-report.timer",
+            "MailLogSentinel Daily Report Service",
+            "Run MailLogSentinel Daily Report",
+            f"{main_exec} --report",
+            work_dir_line,
+            report_sched,
+        ),
+        (
+            "ipinfo-update.service",
+            "ipinfo-update.timer",
+            "Service to update IP DBs for MailLogSentinel",
+            "Timer to update IP DBs",
+            f"{python_exec} {ipinfo_script_path} --update --config {config_path}",
+            "",
+            ip_update_sched,
+        ),
+        (
+            "maillogsentinel-sql-export.service",
+            "maillogsentinel-sql-export.timer",
+            "MailLogSentinel SQL Export Service",
+            "Run MailLogSentinel SQL Export periodically",
+            f"{main_exec} --sql-export",
+            work_dir_line,
+            sql_export_schedule,
+        ),
+        (
+            "maillogsentinel-sql-import.service",
+            "maillogsentinel-sql-import.timer",
+            "MailLogSentinel SQL Import Service",
+            "Run MailLogSentinel SQL Import periodically",
+            f"{main_exec} --sql-import",
+            work_dir_line,
+            sql_import_schedule,
+        ),
+    ]
 
-    return {
-        "maillogsentinel.service": maillogsentinel_service_content,
-        "maillogsentinel-extract.timer": maillogsentinel_extract_timer_content,
-        "maillogsentinel-report.service": maillogsentinel_report_service_content,
-        "maillogsentinel-report.timer": maillogsentinel_report_timer_content,
-        "ipinfo-update.service": ipinfo_update_service_content,
-        "ipinfo-update.timer": ipinfo_update_timer_content,
-        "maillogsentinel-sql-export.service": maillogsentinel_sql_export_service_content,
-        "maillogsentinel-sql-export.timer": maillogsentinel_sql_export_timer_content,
-        "maillogsentinel-sql-import.service": maillogsentinel_sql_import_service_content,
-        "maillogsentinel-sql-import.timer": maillogsentinel_sql_import_timer_content,
-    }
+    unit_files_content = {}
+    for (
+        service,
+        timer,
+        service_description,
+        timer_description,
+        exec_start,
+        working_directory_line,
+        on_calendar,
+    ) in units:
+        unit_files_content[service] = _SERVICE_UNIT_TEMPLATE.format(
+            description=service_description,
+            user=run_as_user,
+            exec_start=exec_start,
+            working_directory_line=working_directory_line,
+        )
+        unit_files_content[timer] = _TIMER_UNIT_TEMPLATE.format(
+            description=timer_description, service=service, on_calendar=on_calendar
+        )
+    return unit_files_content
 
 
 def main_setup():
@@ -1441,7 +1729,7 @@ def main_setup():
     args = parser.parse_args()
 
     try:
-        setup_log_fh = open(log_file_path, "w", encoding="utf-8")
+        setup_log_fh = open(log_file_path, "wb", buffering=1 << 16)
         original_console_print(
             f"Note: The setup process output will be saved to {log_file_path.resolve()}"
         )
@@ -1517,20 +1805,9 @@ def main_setup():
         else:
             original_console_print(log_msg)
 
-        if backed_up_items:
-            original_console_print(
-                "Attempting to restore backed-up items due to interruption..."
-            )
-            for backup_path_str, original_path_str in reversed(backed_up_items):
-                try:
-                    shutil.move(str(backup_path_str), str(original_path_str))
-                    original_console_print(
-                        f"Restored: {backup_path_str} -> {original_path_str}"
-                    )
-                except Exception as e_restore:
-                    original_console_print(
-                        f"Error restoring {backup_path_str} to {original_path_str}: {e_restore}"
-                    )
+        # Remove what this run created before restoring backups: the originals
+        # are recreated at the same paths, and a restore on top of them would
+        # otherwise be deleted again (or, for directories, nested inside).
         if created_final_paths:
             original_console_print(
                 "Attempting to delete created files/directories due to interruption..."
@@ -1545,6 +1822,20 @@ def main_setup():
                     original_console_print(f"Deleted: {path_obj}")
                 except Exception as e_delete:
                     original_console_print(f"Error deleting {path_obj}: {e_delete}")
+        if backed_up_items:
+            original_console_print(
+                "Attempting to restore backed-up items due to interruption..."
+            )
+            for backup_path_str, original_path_str in reversed(backed_up_items):
+                try:
+                    os.replace(backup_path_str, original_path_str)
+                    original_console_print(
+                        f"Restored: {backup_path_str} -> {original_path_str}"
+                    )
+                except Exception as e_restore:
+                    original_console_print(
+                        f"Error restoring {backup_path_str} to {original_path_str}: {e_restore}"
+                    )
         sys.exit(130)
 
     except Exception as e:
@@ -1552,13 +1843,9 @@ def main_setup():
         # No curses cleanup needed here
         if setup_log_fh and not setup_log_fh.closed:
             _setup_print_and_log(error_msg, setup_log_fh)
-            import traceback
-
             _setup_print_and_log(traceback.format_exc(), setup_log_fh)
         else:
             original_console_print(error_msg, file=sys.stderr)
-            import traceback
-
             original_console_print(traceback.format_exc(), file=sys.stderr)
         sys.exit(3)
     finally:
@@ -1,6 +1,7 @@
 """Configuration management for MailLogSentinel."""
 
 import configparser
+import os
 from pathlib import Path
 import logging  # For potential logging within config loading itself
 import sys  # For sys.stderr and sys.exit - ensure this is imported
@@ -32,6 +33,7 @@ DEFAULT_CONFIG: Dict[str, Dict[str, Any]] = {
         "log_file_max_bytes": 1_000_000,
         "log_file_backup_count": 5,
         "log_file": "/var/log/maillogsentinel/maillogsentinel.log",
+        "parse_workers": 0,  # 0 means one worker process per CPU
     },
     "dns_cache": {
         "enabled": True,
@@ -44,6 +46,7 @@ DEFAULT_CONFIG: Dict[str, Dict[str, Any]] = {
         "user": "",
         "password_hash": "",
         "salt": "",
+        "wal_mode": False,  # WAL needs -wal/-shm files next to the database
     },
     "sql_export_systemd": {
         "frequency": "*:0/4",
@@ -75,7 +78,7 @@ class AppConfig:
         self.config_path = config_path  # Store for reference, e.g. in error messages
         self.config_loaded_successfully = False  # Initialize attribute
 
-        if not config_path.is_file():
+        if not os.path.isfile(config_path):
             # Log this attempt, but allow continuation for setup or default generation
             self.logger.warning(
                 f"Config file not found at specified path: {config_path}. "
@@ -138,6 +141,14 @@ class AppConfig:
 
         raw_log_file_str = self._get_str("general", "log_file")
         self.log_file = None if not raw_log_file_str else Path(raw_log_file_str)
+        self.parse_workers = self._get_int("general", "parse_workers")
+        if self.parse_workers < 0:
+            default_workers = DEFAULT_CONFIG["general"]["parse_workers"]
+            self.logger.warning(
+                f"Invalid negative value {self.parse_workers} for "
+                f"[general]parse_workers. Using fallback {default_workers}."
+            )
+            self.parse_workers = default_workers
 
         # [dns_cache]
         self.dns_cache_enabled = self._get_bool("dns_cache", "enabled")
@@ -150,6 +161,7 @@ class AppConfig:
         self.sqlite_user = self._get_str("sqlite_database", "user")
         self.sqlite_password_hash = self._get_str("sqlite_database", "password_hash")
         self.sqlite_salt = self._get_str("sqlite_database", "salt")
+        self.sqlite_wal_mode = self._get_bool("sqlite_database", "wal_mode")
 
         # [sql_export_systemd]
         self.sql_export_frequency = self._get_str("sql_export_systemd", "frequency")
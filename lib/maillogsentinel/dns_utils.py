@@ -1,22 +1,77 @@
 """DNS lookup utilities with caching for MailLogSentinel."""
 
 import socket
-import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import time
 import logging
-from typing import Optional, Tuple, Callable, Dict, Any
+from typing import Optional, Tuple, Dict, Any, Iterable
 
 from . import config
 
+# Failed lookups (NXDOMAIN, timeouts) are cached for at most this many seconds,
+# so a transient resolver problem does not stick for the whole TTL.
+DNS_NEGATIVE_TTL_SECONDS = 60
+
+_CacheEntry = Tuple[Optional[str], Optional[str], float]
+
+
+class ReverseLookupCache:
+    """
+    Thread-safe LRU cache of reverse DNS results with per-entry expiry.
+
+    Successful lookups are kept for `ttl` seconds, failed ones for at most
+    `negative_ttl` seconds. Expired entries are looked up again and replaced.
+    """
+
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = min(ttl, negative_ttl)
+        self.hits = 0
+        self.misses = 0
+        # ip -> (hostname, error_str, expiry as time.monotonic() value)
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, ip: str) -> Tuple[Optional[str], Optional[str]]:
+        """Returns (hostname, error_str) for `ip`, resolving it on a miss."""
+        with self._lock:
+            entry = self._entries.get(ip)
+            if entry is not None and entry[2] > time.monotonic():
+                self._entries.move_to_end(ip)
+                self.hits += 1
+                return entry[0], entry[1]
+            self.misses += 1
+
+        # Resolve without holding the lock so prefetch threads run concurrently.
+        hostname, error_str = _perform_actual_reverse_lookup(ip)
+        if self.max_size > 0:
+            ttl = self.ttl if error_str is None else self.negative_ttl
+            with self._lock:
+                self._entries[ip] = (hostname, error_str, time.monotonic() + ttl)
+                self._entries.move_to_end(ip)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return hostname, error_str
+
+
 # --- Global DNS Cache Variables ---
-# These store the active cache function and its settings after initialization.
-CACHED_DNS_LOOKUP_FUNC: Optional[
-    Callable[[str], Tuple[Optional[str], Optional[str], float]]
-] = None
+# These store the active cache and its settings after initialization.
+DNS_CACHE: Optional[ReverseLookupCache] = None
 DNS_CACHE_SETTINGS: Dict[str, Any] = (
     {}
 )  # Stores effective settings like 'enabled', 'ttl', 'max_size'
 
+# Upper bound on concurrent lookups issued by prefetch_reverse_lookups.
+DNS_PREFETCH_MAX_WORKERS = 32
+# Thread pool shared by all prefetch batches; created on first use.
+_PREFETCH_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
 
 def _perform_actual_reverse_lookup(ip: str) -> Tuple[Optional[str], Optional[str]]:
     """
@@ -57,13 +112,14 @@ def initialize_dns_cache(
     Initializes the DNS caching mechanism based on AppConfig settings.
 
     This function configures the DNS lookup caching behavior for the application.
-    If caching is enabled in `app_config`, it sets up an LRU (Least Recently Used)
-    cache for DNS lookups. The cache settings (size, TTL) are taken from
-    `app_config`.
+    If caching is enabled in `app_config`, it sets up a `ReverseLookupCache`,
+    an LRU (Least Recently Used) cache whose entries expire after the
+    configured TTL (failed lookups after at most `DNS_NEGATIVE_TTL_SECONDS`).
+    The cache settings (size, TTL) are taken from `app_config`.
 
-    The global `CACHED_DNS_LOOKUP_FUNC` is updated to point to the cached
-    lookup function, or set to `None` if caching is disabled. The effective
-    cache settings are stored in the global `DNS_CACHE_SETTINGS` dictionary.
+    The global `DNS_CACHE` is updated to point to the cache, or set to `None`
+    if caching is disabled. The effective cache settings are stored in the
+    global `DNS_CACHE_SETTINGS` dictionary.
 
     Args:
         app_config: An `AppConfig` instance containing DNS cache configuration
@@ -72,38 +128,28 @@ def initialize_dns_cache(
         logger: An optional `logging.Logger` instance for logging messages.
                 If None, a default logger for this module is used.
     """
-    global CACHED_DNS_LOOKUP_FUNC
+    global DNS_CACHE
 
     # Store the settings that will be used by reverse_lookup
     DNS_CACHE_SETTINGS["enabled"] = app_config.dns_cache_enabled
     DNS_CACHE_SETTINGS["ttl"] = app_config.dns_cache_ttl_seconds
-    DNS_CACHE_SETTINGS["max_size"] = (
-        app_config.dns_cache_size
-    )  # Stored for reference, not directly used by lru_cache after init
+    DNS_CACHE_SETTINGS["max_size"] = app_config.dns_cache_size
 
     effective_logger = logger if logger else logging.getLogger(__name__)
 
     if app_config.dns_cache_enabled:
-        # The lru_cache decorator uses the function's code object, so maxsize
-        # must be fixed at definition. If max_size needs to be dynamic after
-        # startup, lru_cache would need to be re-applied, which typically means
-        # redefining the cached function or managing multiple cache instances.
-        # For this application, initializing once at startup is standard.
-        @functools.lru_cache(maxsize=app_config.dns_cache_size)
-        def _dynamically_cached_lookup(
-            ip: str,
-        ) -> Tuple[Optional[str], Optional[str], float]:
-            # This function will be the one decorated by lru_cache
-            hostname, error_str = _perform_actual_reverse_lookup(ip)
-            return hostname, error_str, time.time()  # Store timestamp with the result
-
-        CACHED_DNS_LOOKUP_FUNC = _dynamically_cached_lookup
+        DNS_CACHE = ReverseLookupCache(
+            max_size=app_config.dns_cache_size,
+            ttl=app_config.dns_cache_ttl_seconds,
+            negative_ttl=DNS_NEGATIVE_TTL_SECONDS,
+        )
         effective_logger.info(
-            f"DNS cache initialized with max_size: {app_config.dns_cache_size}, "
-            f"TTL: {app_config.dns_cache_ttl_seconds}s"
+            "DNS cache initialized with max_size: %s, TTL: %ss",
+            app_config.dns_cache_size,
+            app_config.dns_cache_ttl_seconds,
         )
     else:
-        CACHED_DNS_LOOKUP_FUNC = None  # Ensure it's None if caching is disabled
+        DNS_CACHE = None  # Ensure it's None if caching is disabled
         effective_logger.info("DNS cache is disabled by configuration.")
 
 
@@ -115,11 +161,11 @@ def reverse_lookup(
 
     This function attempts to find the hostname associated with an IP address.
     If DNS caching is enabled (via `initialize_dns_cache` and `AppConfig`),
-    it first checks the cache. Cache entries are considered stale if their
-    Time-To-Live (TTL) has expired, triggering a fresh lookup.
+    it first checks the cache. Expired entries (past their TTL, or the
+    shorter negative TTL for failed lookups) trigger a fresh lookup whose
+    result replaces the cached one.
 
-    If caching is disabled or the item is not in the cache (or stale),
-    it performs a direct DNS lookup.
+    If caching is disabled, it performs a direct DNS lookup.
 
     Args:
         ip: The IP address (string) to look up.
@@ -134,33 +180,94 @@ def reverse_lookup(
         If successful, the error string is None. If failed, the hostname is None.
     """
 
-    cache_is_effectively_enabled = DNS_CACHE_SETTINGS.get("enabled", False)
-
-    if not cache_is_effectively_enabled or CACHED_DNS_LOOKUP_FUNC is None:
+    if not DNS_CACHE_SETTINGS.get("enabled", False) or DNS_CACHE is None:
         if logger:
-            logger.debug(f"DNS cache not used for {ip}. Performing direct lookup.")
+            logger.debug("DNS cache not used for %s. Performing direct lookup.", ip)
         hostname, error_str = _perform_actual_reverse_lookup(ip)
         if error_str and logger:
-            logger.debug(f"Reverse lookup failed for IP {ip}: {error_str}")
+            logger.debug("Reverse lookup failed for IP %s: %s", ip, error_str)
         return hostname, error_str
 
-    dns_ttl_seconds = DNS_CACHE_SETTINGS.get("ttl", 3600)
-    cached_hostname, cached_error_str, timestamp = CACHED_DNS_LOOKUP_FUNC(ip)
-    final_hostname: Optional[str] = None
-    final_error_str: Optional[str] = None
+    hostname, error_str = DNS_CACHE.lookup(ip)
+    # Runs once per CSV row: pass arguments so the message is only formatted
+    # when DEBUG logging is enabled.
+    if error_str and logger:
+        logger.debug("Reverse lookup for IP %s (cached/fresh): %s", ip, error_str)
+    return hostname, error_str
 
-    if time.time() - timestamp > dns_ttl_seconds:
-        if logger:
-            logger.info(f"DNS cache for {ip} is stale. Performing fresh lookup.")
-        fresh_hostname, fresh_error_str = _perform_actual_reverse_lookup(ip)
-        final_hostname = fresh_hostname
-        final_error_str = fresh_error_str
-    else:
-        if logger:
-            logger.debug(f"Using valid cached DNS entry for {ip}.")
-        final_hostname = cached_hostname
-        final_error_str = cached_error_str
 
-    if final_error_str and logger:
-        logger.debug(f"Reverse lookup for IP {ip} (cached/fresh): {final_error_str}")
-    return final_hostname, final_error_str
+def log_dns_cache_stats(logger: logging.Logger) -> None:
+    """Logs the hit/miss counters of the DNS cache, if it is enabled."""
+    if DNS_CACHE is None:
+        return
+    logger.info(
+        "DNS cache: %d hit(s), %d miss(es), %d cached",
+        DNS_CACHE.hits,
+        DNS_CACHE.misses,
+        len(DNS_CACHE),
+    )
+
+
+def _get_prefetch_executor() -> ThreadPoolExecutor:
+    """Returns the shared prefetch thread pool, creating it on first use."""
+    global _PREFETCH_EXECUTOR
+    if _PREFETCH_EXECUTOR is None:
+        # Threads are started lazily and joined by concurrent.futures at exit.
+        _PREFETCH_EXECUTOR = ThreadPoolExecutor(
+            max_workers=DNS_PREFETCH_MAX_WORKERS, thread_name_prefix="dns-prefetch"
+        )
+    return _PREFETCH_EXECUTOR
+
+
+def prefetch_batch_limit() -> int:
+    """
+    Returns the most unique IPs worth prefetching in one batch.
+
+    This is the DNS cache size: results of a larger batch would be evicted
+    before the per-row `reverse_lookup` calls read them, and those IPs would
+    then be resolved a second time. Returns 0 (no limit) when the cache is
+    disabled or cannot hold any entry (a size of 0 or less), since
+    prefetching is then a no-op anyway.
+    """
+    if (
+        not DNS_CACHE_SETTINGS.get("enabled", False)
+        or DNS_CACHE is None
+        or DNS_CACHE.max_size <= 0
+    ):
+        return 0
+    return DNS_CACHE.max_size
+
+
+def prefetch_reverse_lookups(
+    ips: Iterable[str], logger: Optional[logging.Logger] = None
+) -> None:
+    """
+    Resolves a batch of IP addresses concurrently to warm the DNS cache.
+
+    `socket.gethostbyaddr` blocks for up to the resolver timeout on every
+    miss, so resolving the IPs of a batch in a thread pool turns N sequential
+    round trips into roughly one. Subsequent `reverse_lookup` calls for these
+    IPs are then served from the cache. The pool is shared across batches,
+    so its worker threads are started once per run rather than per batch.
+
+    This is a no-op when the DNS cache is disabled or its size is 0 or less,
+    since the results would have nowhere to go.
+
+    Args:
+        ips: The IP addresses (strings) to resolve. Should not contain duplicates.
+        logger: An optional `logging.Logger` instance for debug messages.
+    """
+    if (
+        not DNS_CACHE_SETTINGS.get("enabled", False)
+        or DNS_CACHE is None
+        or DNS_CACHE.max_size <= 0
+    ):
+        return
+    ips = list(ips)
+    if not ips:
+        return
+    if logger:
+        logger.debug("Prefetching reverse DNS for %d IP(s).", len(ips))
+    # The cache is thread-safe; consuming the iterator waits for all lookups.
+    for _ in _get_prefetch_executor().map(DNS_CACHE.lookup, ips):
+        pass
@@ -10,29 +10,348 @@ formats.
 
 import csv
 import gzip
+import mmap
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import (
     Optional,
     List,
     Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Sequence,
+    Set,
+    Tuple,
+    TYPE_CHECKING,
 )
 import logging
 
 # Add bin directory to sys.path to allow importing ipinfo
 # sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "bin")) # Removed for cleaner path management
-import ipinfo
+if TYPE_CHECKING:  # Only needed for annotations; keeps import time low
+    import ipinfo
 
 # Local imports
 from lib.maillogsentinel.log_utils import (
-    _parse_log_line,
+    PAT,
+    SASL_MARKER,
+    _parse_log_fields,
 )  # Import the centralized function
 
+# Number of candidate lines collected before their IPs are handed to the
+# prefetch callback of extract_entries.
+PREFETCH_BATCH_SIZE = 1024
+# Buffer size (bytes) used when appending rows to the CSV file.
+CSV_WRITE_BUFFER_SIZE = 1 << 20
+# Chunk size (bytes) used when reading the active main log.
+MAIN_LOG_READ_SIZE = 1 << 20
+
 
 # Constants are now in log_utils.py
 # Regex optimization considerations remain valid for log_utils.py.
 
-# _parse_log_line is now imported from log_utils.py
+# _parse_log_fields is now imported from log_utils.py
+
+
+class _CsvRowWriter:
+    """
+    Writes rows like `csv.writer(fobj, delimiter=";")` with QUOTE_MINIMAL.
+
+    Almost no row needs quoting, so rows are joined and written as-is. A row
+    with a field containing the delimiter, a quote or a line break is handed
+    to the csv module instead, keeping the output byte-for-byte identical.
+    """
+
+    def __init__(self, fobj) -> None:
+        self._write = fobj.write
+        self._csv_writer = csv.writer(fobj, delimiter=";", quoting=csv.QUOTE_MINIMAL)
+
+    def writerow(self, row: Sequence[str]) -> None:
+        line = ";".join(row)
+        if (
+            line.count(";") != len(row) - 1
+            or '"' in line
+            or "\n" in line
+            or "\r" in line
+            or not line
+        ):
+            self._csv_writer.writerow(row)
+        else:
+            self._write(line + "\r\n")
+
+    def writerows(self, rows: Iterable[Sequence[str]]) -> None:
+        for row in rows:
+            self.writerow(row)
+
+
+def _iter_buffer_candidate_lines(buf, start: int, end: int) -> Iterator[str]:
+    """
+    Yields decoded SASL candidate lines from `buf[start:end]`.
+
+    Instead of splitting the buffer into lines, this jumps from one
+    occurrence of `SASL_MARKER` to the next with `find` and only slices out
+    and decodes the line around it. The vast majority of mail log lines
+    never reach Python at all. A final line without a trailing newline is
+    still yielded. `buf` may be `bytes` or an `mmap.mmap`.
+    """
+    marker = SASL_MARKER.encode("ascii")
+    pos = start
+    while pos < end:
+        hit = buf.find(marker, pos, end)
+        if hit == -1:
+            return
+        line_start = buf.rfind(b"\n", pos, hit) + 1 or pos
+        nl = buf.find(b"\n", hit, end)
+        stop = end if nl == -1 else nl + 1
+        yield buf[line_start:stop].decode("utf-8", errors="ignore")
+        pos = stop
+
+
+def _iter_mapped_candidate_lines(mm: mmap.mmap, start: int) -> Iterator[str]:
+    """
+    Yields decoded SASL candidate lines from a memory-mapped log file.
+
+    Scanning starts at byte `start`. The mapping is advised as sequential and
+    the unread part is queued for readahead, so the kernel fetches pages
+    ahead of the scan instead of taking one blocking page fault at a time.
+
+    Only use this for files that are no longer written to: if a mapped file
+    is truncated while it is scanned, touching pages past the new end of
+    file raises SIGBUS and kills the process.
+    """
+    end = len(mm)
+    if hasattr(mmap, "MADV_SEQUENTIAL"):  # Python 3.8+ on platforms with madvise
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+        aligned_start = start - start % mmap.PAGESIZE
+        if aligned_start < end:
+            mm.madvise(mmap.MADV_WILLNEED, aligned_start, end - aligned_start)
+    return _iter_buffer_candidate_lines(mm, start, end)
+
+
+def _iter_read_candidate_lines(fobj, start: int, end: int) -> Iterator[str]:
+    """
+    Yields decoded SASL candidate lines from bytes `start` to `end` of `fobj`.
+
+    Used for the active main log, which may be truncated in place while it is
+    read (logrotate `copytruncate`); unlike a memory mapping, a plain read then
+    simply stops at the new end of file. The file is read in chunks of
+    `MAIN_LOG_READ_SIZE` bytes, so memory use does not grow with the log.
+    After the generator is exhausted, `fobj.tell()` is the offset actually
+    reached.
+    """
+    fobj.seek(start)
+    pos = start
+    tail = b""
+    while pos < end:
+        chunk = fobj.read(min(MAIN_LOG_READ_SIZE, end - pos))
+        if not chunk:
+            break  # Truncated since it was stat'ed
+        pos += len(chunk)
+        buf = tail + chunk
+        cut = buf.rfind(b"\n") + 1
+        tail = buf[cut:]
+        yield from _iter_buffer_candidate_lines(buf, 0, cut)
+    if tail:
+        yield from _iter_buffer_candidate_lines(tail, 0, len(tail))
+
+
+def _write_entries(
+    lines: Iterable[str],
+    writer,
+    current_year: int,
+    logger: logging.Logger,
+    ip_info_mgr: Optional["ipinfo.ipinfo.IPInfoManager"],
+    reverse_lookup_func: Callable,
+    prefetch_func: Optional[Callable[[Set[str]], None]] = None,
+    legacy_parser: bool = False,
+    prefetch_max_ips: int = 0,
+) -> None:
+    """
+    Parses `lines` and writes one CSV row per SASL authentication entry found.
+
+    When `prefetch_func` is given, candidate lines are processed in batches of
+    at most `PREFETCH_BATCH_SIZE` lines and, if `prefetch_max_ips` is set, at
+    most that many unique IPs: the unique IPs of a batch are passed to
+    `prefetch_func` first (e.g. to resolve them concurrently), then the lines
+    are parsed in their original order.
+    """
+
+    def _parse(line: str) -> Optional[Tuple[str, ...]]:
+        return _parse_log_fields(
+            line,
+            current_year,
+            logger,
+            ip_info_mgr,
+            reverse_lookup_func,
+            legacy_parser,
+        )
+
+    # PAT requires this literal, so other lines can never produce an entry.
+    candidates = (line for line in lines if SASL_MARKER in line)
+
+    if prefetch_func is None:
+        writer.writerows(filter(None, map(_parse, candidates)))
+        return
+
+    for batch, ips in _prefetch_batches(candidates, prefetch_max_ips):
+        if ips:
+            prefetch_func(ips)
+        writer.writerows(filter(None, map(_parse, batch)))
+
+
+def _prefetch_batches(
+    lines: Iterable[str], max_ips: int = 0
+) -> Iterator[Tuple[List[str], Set[str]]]:
+    """
+    Groups candidate lines into (lines, unique IPs) batches for prefetching.
+
+    A batch holds at most `PREFETCH_BATCH_SIZE` lines and, if `max_ips` is
+    set, at most `max_ips` unique IPs. Callers pass the DNS cache size there:
+    with more unique IPs than the cache holds, prefetched results would be
+    evicted before the lines of the batch read them.
+    """
+    batch: List[str] = []
+    ips: Set[str] = set()
+    for line in lines:
+        m = PAT.search(line)
+        ip = m.group("ip") if m else None
+        if len(batch) >= PREFETCH_BATCH_SIZE or (
+            max_ips and ip is not None and ip not in ips and len(ips) >= max_ips
+        ):
+            yield batch, ips
+            batch, ips = [], set()
+        batch.append(line)
+        if ip is not None:
+            ips.add(ip)
+    if batch:
+        yield batch, ips
+
+
+def _prefetch_files(filepaths: List[Path], logger: logging.Logger) -> None:
+    """
+    Asks the kernel to start reading all given files into the page cache.
+
+    `POSIX_FADV_WILLNEED` schedules asynchronous readahead, so the reads for
+    later (rotated) files are issued up front and overlap with parsing of the
+    earlier ones. Errors are ignored: this is only a hint.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for path_obj in filepaths:
+        try:
+            fd = os.open(path_obj, os.O_RDONLY)
+        except OSError:
+            continue  # extract_entries reports unreadable files itself
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError as e:
+            logger.debug(f"Could not prefetch {path_obj}: {e}")
+        finally:
+            os.close(fd)
+
+
+def _read_candidate_lines(path_str: str, is_gzipped: bool) -> List[str]:
+    """
+    Returns every SASL candidate line of a whole log file.
+
+    Runs in a worker process for rotated logs, so decompression and scanning
+    of several files happen in parallel. Only module-level, picklable
+    arguments are used; DNS and GeoIP lookups stay in the parent process.
+    """
+    if is_gzipped:
+        with gzip.open(path_str, mode="rt", encoding="utf-8", errors="ignore") as fobj:
+            return [line for line in fobj if SASL_MARKER in line]
+    with open(path_str, "rb") as fobj:
+        if os.fstat(fobj.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return list(_iter_mapped_candidate_lines(mm, 0))
+
+
+class _RotatedReads:
+    """
+    Reads rotated logs in a process pool, a bounded number at a time.
+
+    Only `window` files are in flight at once: the next file is submitted as
+    each result is taken, so the candidate lines of at most `window` files
+    are held in memory instead of those of every rotated log. Files must be
+    taken in the order they were given; files that are skipped (e.g. because
+    they could not be stat'ed) are dropped when a later file is taken.
+    """
+
+    def __init__(
+        self,
+        executor: ProcessPoolExecutor,
+        paths: List[Path],
+        is_gzip_func: Callable,
+        window: int,
+    ) -> None:
+        self._executor = executor
+        self._is_gzip_func = is_gzip_func
+        self._window = window
+        self._pending = deque(paths)
+        self._futures: "OrderedDict[Path, Future]" = OrderedDict()
+        self._fill()
+
+    def _fill(self) -> None:
+        while self._pending and len(self._futures) < self._window:
+            p = self._pending.popleft()
+            self._futures[p] = self._executor.submit(
+                _read_candidate_lines, os.fspath(p), self._is_gzip_func(p)
+            )
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._futures or path in self._pending
+
+    def pop(self, path: Path) -> List[str]:
+        """Returns the candidate lines of `path` and starts the next read."""
+        while self._futures:
+            p, future = self._futures.popitem(last=False)
+            self._fill()
+            if p == path:
+                return future.result()
+            future.cancel()  # Skipped by the caller
+        raise KeyError(path)
+
+
+@contextmanager
+def _read_rotated_files_in_background(
+    filepaths: List[Path],
+    maillog_path_obj: Path,
+    is_gzip_func: Callable,
+    logger: logging.Logger,
+    max_workers: int = 0,
+) -> Iterator[Optional[_RotatedReads]]:
+    """
+    Starts reading the rotated logs in `filepaths` in a process pool.
+
+    Yields a `_RotatedReads` from which the candidate lines of each rotated
+    log are taken, in order. None is yielded (and no pool is started) when
+    there are fewer than two rotated files, e.g. on ordinary incremental
+    runs, when `max_workers` is 1, or if the pool cannot be created; callers
+    then read the files themselves. A `max_workers` of 0 uses one process
+    per CPU.
+    """
+    rotated = [p for p in filepaths if p != maillog_path_obj]
+    if len(rotated) < 2 or max_workers == 1:
+        yield None
+        return
+    workers = min(len(rotated), max_workers or os.cpu_count() or 1)
+    try:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    except (OSError, NotImplementedError) as e:
+        logger.warning(f"Could not start worker processes, reading serially: {e}")
+        yield None
+        return
+    try:
+        yield _RotatedReads(executor, rotated, is_gzip_func, workers)
+    finally:
+        executor.shutdown(cancel_futures=True)
 
 
 def extract_entries(
@@ -47,13 +366,18 @@ def extract_entries(
     is_gzip_func: Callable,
     offset: int = 0,
     progress_callback: Optional[Callable[[int, int], None]] = None,
-) -> int:
+    prefetch_func: Optional[Callable[[Set[str]], None]] = None,
+    rotated_offsets: Optional[Dict[Path, int]] = None,
+    legacy_parser: bool = False,
+    max_workers: int = 0,
+    prefetch_max_ips: int = 0,
+) -> Tuple[int, Optional[int]]:
     """
     Extracts SASL authentication failure entries from log files and appends them to a CSV file.
 
     This function processes a list of log files, including the main mail log and
     its rotated versions. It reads each file, identifies lines corresponding to
-    SASL authentication failures using `_parse_log_line` from `log_utils`,
+    SASL authentication failures using `_parse_log_fields` from `log_utils`,
     and writes the extracted data as a new row in the specified CSV file.
 
     It handles log rotation for the main mail log file (`maillog_path_obj`) by
@@ -73,8 +397,8 @@ def extract_entries(
                        will be written. A header is added if the file doesn't exist.
         logger: A `logging.Logger` instance for logging progress and errors.
         ip_info_mgr: An optional `ipinfo.IPInfoManager` instance passed to
-                     `_parse_log_line` for IP geolocation lookups.
-        reverse_lookup_func: A callable passed to `_parse_log_line` for
+                     `_parse_log_fields` for IP geolocation lookups.
+        reverse_lookup_func: A callable passed to `_parse_log_fields` for
                              performing reverse DNS lookups.
         is_gzip_func: A callable that takes a `Path` object and returns `True`
                       if the file is gzipped, `False` otherwise.
@@ -83,15 +407,34 @@ def extract_entries(
         progress_callback: An optional callable that is invoked with
                            (files_processed_count, total_files) during processing
                            to update progress.
+        prefetch_func: An optional callable that receives each batch of unique
+                       IPs before their lines are parsed, e.g. to warm the
+                       reverse DNS cache concurrently.
+        rotated_offsets: Optional byte offsets to resume from for uncompressed
+                         rotated files, e.g. the remainder of the previous main
+                         log after a rotation. Other rotated files are read
+                         from the beginning.
+        legacy_parser: If True, `_parse_log_fields` uses the original regex to
+                       split the syslog header.
+        max_workers: Number of worker processes used to read rotated files in
+                     parallel. 0 means one per CPU; 1 reads them serially.
+        prefetch_max_ips: Maximum number of unique IPs handed to
+                          `prefetch_func` at once, e.g. the DNS cache size so
+                          prefetched results are not evicted before use.
+                          0 means batches are bounded by line count only.
 
     Returns:
-        The new offset (integer) to be used for the next incremental read of
-        `maillog_path_obj`. This is typically the size of `maillog_path_obj`
-        after processing it, or the previous offset if `maillog_path_obj`
-        was not processed or rotated.
+        A (new offset, inode) tuple. The offset is to be used for the next
+        incremental read of `maillog_path_obj`; it is typically the size of
+        `maillog_path_obj` after processing it, or the previous offset if
+        `maillog_path_obj` was not processed or rotated. The inode is taken
+        from the handle the main log was actually read through, so it matches
+        the offset even if the log is rotated mid-run; it is None if the main
+        log was not read.
     """
     # curr_off is initialized per file inside the loop.
     new_off = offset  # Will be updated only if maillog_path_obj is processed
+    main_log_ino = None
     csv_file_path = Path(csvpath_param)
     header = not csv_file_path.is_file()
     current_year = datetime.now().year
@@ -103,8 +446,21 @@ def extract_entries(
     if progress_callback and total_files > 0:
         progress_callback(0, total_files)
 
-    with csv_file_path.open("a", encoding="utf-8", newline="") as csvf:
-        writer = csv.writer(csvf, delimiter=";", quoting=csv.QUOTE_MINIMAL)
+    if total_files > 1:
+        _prefetch_files(filepaths, logger)
+
+    # A large buffer lets rows accumulate in memory instead of hitting the
+    # file every few hundred rows.
+    with csv_file_path.open(
+        "a", buffering=CSV_WRITE_BUFFER_SIZE, encoding="utf-8", newline=""
+    ) as csvf, _read_rotated_files_in_background(
+        [p for p in filepaths if p not in (rotated_offsets or {})],
+        maillog_path_obj,
+        is_gzip_func,
+        logger,
+        max_workers,
+    ) as rotated_candidates:
+        writer = _CsvRowWriter(csvf)
         if header:
             writer.writerow(
                 [
@@ -143,57 +499,113 @@ def extract_entries(
                             f"Rotation detected for {path_obj.name}, resetting offset {current_file_offset} -> 0"
                         )
                         current_file_offset = 0
-                # For rotated files, current_file_offset remains 0, meaning they are read from the start.
+                elif rotated_offsets and path_obj in rotated_offsets:
+                    current_file_offset = rotated_offsets[path_obj]
+                # Other rotated files keep offset 0, meaning they are read from the start.
 
                 is_gzipped_file = is_gzip_func(path_obj)
-                file_open_mode = "rt"  # Text mode for both gzip and regular files
+                file_open_mode = "rt"  # Gzipped logs are read in text mode
 
-                if is_gzipped_file:
+                if rotated_candidates is not None and path_obj in rotated_candidates:
+                    logger.debug(f"Reading rotated file {path_obj.name} from beginning")
+                    _write_entries(
+                        rotated_candidates.pop(path_obj),
+                        writer,
+                        current_year,
+                        logger,
+                        ip_info_mgr,
+                        reverse_lookup_func,
+                        prefetch_func,
+                        legacy_parser,
+                        prefetch_max_ips,
+                    )
+                elif is_gzipped_file:
                     with gzip.open(
                         path_obj, mode=file_open_mode, encoding="utf-8", errors="ignore"
                     ) as fobj:
-                        for line in fobj:
-                            parsed_data = _parse_log_line(
-                                line,
-                                current_year,
-                                logger,
-                                ip_info_mgr,
-                                reverse_lookup_func,
-                            )
-                            if parsed_data:
-                                writer.writerow(list(parsed_data.values()))
+                        _write_entries(
+                            fobj,
+                            writer,
+                            current_year,
+                            logger,
+                            ip_info_mgr,
+                            reverse_lookup_func,
+                            prefetch_func,
+                            legacy_parser,
+                            prefetch_max_ips,
+                        )
                 else:  # Not gzipped
-                    with path_obj.open(
-                        mode=file_open_mode, encoding="utf-8", errors="ignore"
-                    ) as fobj:
-                        # Only seek if it's the main log file and being read incrementally
-                        if path_obj == maillog_path_obj:
-                            logger.debug(
-                                f"Incremental read of {path_obj.name} from offset {current_file_offset}"
-                            )
-                            fobj.seek(current_file_offset)
-                        else:
-                            logger.debug(
-                                f"Reading rotated file {path_obj.name} from beginning"
-                            )
-
-                        for line in fobj:
-                            parsed_data = _parse_log_line(
-                                line,
-                                current_year,
-                                logger,
-                                ip_info_mgr,
-                                reverse_lookup_func,
-                            )
-                            if parsed_data:
-                                writer.writerow(list(parsed_data.values()))
-
-                        # Update offset only FROM the main log file
-                        if path_obj == maillog_path_obj:
-                            new_off = fobj.tell()
-                            logger.debug(
-                                f"Offset for {path_obj.name} updated to {new_off}"
-                            )
+                    # Only the main log file is read incrementally from the saved offset
+                    if path_obj == maillog_path_obj:
+                        logger.debug(
+                            f"Incremental read of {path_obj.name} from offset {current_file_offset}"
+                        )
+                    else:
+                        logger.debug(
+                            f"Reading rotated file {path_obj.name} from offset {current_file_offset}"
+                        )
+
+                    # Unbuffered: reads are already chunked, and no stale
+                    # read-ahead survives a truncation of the live log.
+                    with path_obj.open("rb", buffering=0) as fobj:
+                        fobj_stat = os.fstat(fobj.fileno())
+                        end_offset = fobj_stat.st_size
+                        # Nothing new to read (and mmap cannot map an empty file).
+                        if end_offset > current_file_offset:
+                            if hasattr(os, "posix_fadvise"):
+                                os.posix_fadvise(
+                                    fobj.fileno(),
+                                    current_file_offset,
+                                    0,
+                                    os.POSIX_FADV_SEQUENTIAL,
+                                )
+                            with ExitStack() as stack:
+                                if path_obj == maillog_path_obj:
+                                    # The live log may be truncated while it is
+                                    # read, so it is not memory-mapped.
+                                    lines = _iter_read_candidate_lines(
+                                        fobj, current_file_offset, end_offset
+                                    )
+                                else:
+                                    mm = stack.enter_context(
+                                        mmap.mmap(
+                                            fobj.fileno(), 0, access=mmap.ACCESS_READ
+                                        )
+                                    )
+                                    end_offset = len(mm)
+                                    lines = _iter_mapped_candidate_lines(
+                                        mm, current_file_offset
+                                    )
+                                _write_entries(
+                                    lines,
+                                    writer,
+                                    current_year,
+                                    logger,
+                                    ip_info_mgr,
+                                    reverse_lookup_func,
+                                    prefetch_func,
+                                    legacy_parser,
+                                    prefetch_max_ips,
+                                )
+                            if path_obj == maillog_path_obj:
+                                # Stops short of the stat'ed size if truncated.
+                                end_offset = fobj.tell()
+                                # The processed prefix of the main log is never
+                                # read again; let the kernel drop it from the
+                                # page cache.
+                                if hasattr(os, "posix_fadvise"):
+                                    os.posix_fadvise(
+                                        fobj.fileno(),
+                                        0,
+                                        end_offset,
+                                        os.POSIX_FADV_DONTNEED,
+                                    )
+
+                    # Update offset only FROM the main log file
+                    if path_obj == maillog_path_obj:
+                        new_off = end_offset
+                        main_log_ino = fobj_stat.st_ino
+                        logger.debug(f"Offset for {path_obj.name} updated to {new_off}")
 
             except (IOError, OSError) as e:
                 logger.error(f"Error processing file {path_obj.name}: {e}")
@@ -208,10 +620,15 @@ def extract_entries(
                 if progress_callback:
                     progress_callback(files_processed_count, total_files)
 
+        # Make the rows durable before the caller persists the new offset, so a
+        # crash cannot leave the state file ahead of the CSV.
+        csvf.flush()
+        getattr(os, "fdatasync", os.fsync)(csvf.fileno())
+
     # If filepaths was empty, new_off remains its initial value (offset).
     # If maillog_path_obj was not in filepaths (e.g. only rotated logs processed after initial run),
     # new_off also remains its initial value from the last successful processing of maillog_path_obj.
     logger.info(
         f"Finished processing all {total_files} specified file(s). Final offset for {maillog_path_obj.name} is {new_off}."
     )
-    return new_off
+    return new_off, main_log_ino
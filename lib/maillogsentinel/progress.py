@@ -12,9 +12,17 @@ This module includes functions to:
 It uses ANSI escape codes for colors and special characters for icons to enhance
 the visual feedback of command-line tools. Terminal width is considered for
 properly clearing lines.
+
+When output does not go to a terminal (e.g. under a systemd timer), a tracker
+created with `batch=True` skips the progress-bar redraws and collects the step
+results and messages, writing them out in a single write at the end. Runs
+started by systemd can use `NullProgressTracker`, which drops step output
+altogether and only reports errors on stderr.
 """
+import atexit
 import sys
 import shutil
+from typing import List
 
 # ANSI escape codes for colors
 GREEN = "\033[92m"
@@ -36,8 +44,25 @@ def get_terminal_width():
 
 
 class ProgressTracker:
-    def __init__(self):
+    def __init__(self, batch: bool = False):
+        """
+        Args:
+            batch: If True, progress-bar and step-start output is suppressed and
+                   all other output is buffered until `finalize` (or `flush`,
+                   which also runs at interpreter exit).
+        """
         self.current_step_message = ""
+        self.batch = batch
+        self._pending_output: List[str] = []
+        if batch:
+            atexit.register(self.flush)
+
+    def flush(self) -> None:
+        """Writes any output buffered in batch mode to stdout."""
+        if self._pending_output:
+            sys.stdout.write("".join(self._pending_output))
+            sys.stdout.flush()
+            self._pending_output.clear()
 
     def start_step(self, step_name: str) -> None:
         """
@@ -50,6 +75,8 @@ class ProgressTracker:
         Args:
             step_name: The name of the step to display.
         """
+        if self.batch:
+            return
         # Clear any previous step's lingering progress bar line
         if self.current_step_message:
             sys.stdout.write("\r" + " " * len(self.current_step_message) + "\r")
@@ -74,6 +101,8 @@ class ProgressTracker:
             length: The character length of the progress bar itself (excluding
                     percentage and step message). Defaults to 40.
         """
+        if self.batch:
+            return
         if total_value == 0:  # Avoid division by zero for indeterminate progress
             progress_text = "In progress..."
         else:
@@ -106,6 +135,8 @@ class ProgressTracker:
             message: The message to display for indeterminate progress.
                      Defaults to "Processing...".
         """
+        if self.batch:
+            return
         # Ensure the full line is overwritten
         terminal_width = get_terminal_width()
         full_line = "\r" + self.current_step_message + message
@@ -143,6 +174,10 @@ class ProgressTracker:
         if details:
             output_message += f" ({details})"
 
+        if self.batch:
+            self._pending_output.append(output_message + "\n")
+            return
+
         # Clear the current line
         terminal_width = get_terminal_width()
         sys.stdout.write("\r" + " " * terminal_width + "\r")  # Clear the line
@@ -163,7 +198,7 @@ class ProgressTracker:
             level: The level of the message ('info', 'warning', 'error').
                    Defaults to 'info'.
         """
-        if self.current_step_message:
+        if self.current_step_message and not self.batch:
             sys.stdout.write(
                 "\r" + " " * (len(self.current_step_message) + 50) + "\r"
             )  # 50 for progress bar
@@ -180,6 +215,10 @@ class ProgressTracker:
         elif level == "info":
             icon = f"{ORANGE}{TRIANGLE_MARK}{RESET} "
 
+        if self.batch:
+            self._pending_output.append(f"{icon}{color}{message}{RESET}\n")
+            return
+
         sys.stdout.write(f"{icon}{color}{message}{RESET}\n")
         sys.stdout.flush()
 
@@ -204,11 +243,43 @@ class ProgressTracker:
             self.current_step_message = ""
 
         if success:
-            sys.stdout.write(
+            summary = (
                 f"\n{GREEN}{CHECK_MARK} All steps succeeded. {final_message}{RESET}\n"
             )
         else:
-            sys.stdout.write(
-                f"\n{RED}{CROSS_MARK} Some steps failed. {final_message}{RESET}\n"
-            )
-        sys.stdout.flush()
+            summary = f"\n{RED}{CROSS_MARK} Some steps failed. {final_message}{RESET}\n"
+        self._pending_output.append(summary)
+        self.flush()
+
+
+class NullProgressTracker(ProgressTracker):
+    """
+    Tracker that discards step and progress output.
+
+    Meant for runs started by systemd, where nobody watches the steps and the
+    details are in the application log file. Error messages and a failed
+    final result are still written to stderr, one line each, so they show up
+    in the journal and `systemctl status`.
+    """
+
+    def start_step(self, step_name: str) -> None:
+        pass
+
+    def update_progress(
+        self, current_value: int, total_value: int, length: int = 40
+    ) -> None:
+        pass
+
+    def update_indeterminate_progress(self, message: str = "Processing...") -> None:
+        pass
+
+    def complete_step(self, step_name: str, success: bool, details: str = "") -> None:
+        pass
+
+    def print_message(self, message: str, level: str = "info") -> None:
+        if level == "error":
+            sys.stderr.write(f"{message}\n")
+
+    def finalize(self, success: bool, final_message: str) -> None:
+        if not success:
+            sys.stderr.write(f"Some steps failed. {final_message}\n")
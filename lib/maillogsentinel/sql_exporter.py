@@ -22,6 +22,9 @@ from lib.maillogsentinel.config import AppConfig  # Import AppConfig
 SQL_EXPORT_SUBDIR = "sql"
 OFFSET_FILENAME = "sql_state.offset"  # Stored in state_dir
 LOG_PREFIX = "sql_export"
+# Buffer size for reading the CSV and writing the SQL file, so one export
+# issues a write() per MiB of INSERT statements rather than per 8 KiB.
+EXPORT_IO_BUFFER_SIZE = 1 << 20
 
 logger = logging.getLogger(__name__)
 
@@ -236,7 +239,10 @@ def format_sql_value(value: Any, sql_type_def: str) -> str:
         except (ValueError, TypeError):
             if is_nullable:
                 logger.warning(
-                    f"{LOG_PREFIX}: Could not convert '{value}' to int for SQL; using NULL. Column: {sql_type_def}"
+                    "%s: Could not convert '%s' to int for SQL; using NULL. Column: %s",
+                    LOG_PREFIX,
+                    value,
+                    sql_type_def,
                 )
                 return "NULL"
             else:
@@ -286,7 +292,9 @@ def generate_insert_statement(
 
         if not csv_col_name:
             logger.warning(
-                f"{LOG_PREFIX}: No CSV column specified for SQL column '{sql_col_name}'. Skipping this column."
+                "%s: No CSV column specified for SQL column '%s'. Skipping this column.",
+                LOG_PREFIX,
+                sql_col_name,
             )
             continue
 
@@ -479,8 +487,14 @@ def run_sql_export(config: AppConfig, output_log_level: str = "INFO") -> bool:
     )
 
     try:
-        with open(csv_file_path, "r", encoding="utf-8", newline="") as infile, open(
-            sql_file_path, "w", encoding="utf-8"
+        with open(
+            csv_file_path,
+            "r",
+            buffering=EXPORT_IO_BUFFER_SIZE,
+            encoding="utf-8",
+            newline="",
+        ) as infile, open(
+            sql_file_path, "w", buffering=EXPORT_IO_BUFFER_SIZE, encoding="utf-8"
         ) as outfile:
 
             infile.seek(current_offset)
@@ -555,7 +569,9 @@ def run_sql_export(config: AppConfig, output_log_level: str = "INFO") -> bool:
                 records_processed += 1
                 if not any(row.values()):
                     logger.debug(
-                        f"{LOG_PREFIX}: Skipping empty or malformed row at line number (approx) {row_num}."
+                        "%s: Skipping empty or malformed row at line number (approx) %d.",
+                        LOG_PREFIX,
+                        row_num,
                     )
                     continue
 
@@ -567,7 +583,10 @@ def run_sql_export(config: AppConfig, output_log_level: str = "INFO") -> bool:
                     records_exported += 1
                 except SQLExportError as e:
                     logger.error(
-                        f"{LOG_PREFIX}: Failed to process row (approx line {row_num}). Reason: {e}"
+                        "%s: Failed to process row (approx line %d). Reason: %s",
+                        LOG_PREFIX,
+                        row_num,
+                        e,
                     )
                     conversion_errors += 1
                 except Exception as e:
@@ -35,6 +35,22 @@ MAX_RETRIES = 5
 INITIAL_BACKOFF_SECONDS = 1
 MAX_BACKOFF_SECONDS = 60
 
+# Applied to every import connection.
+SQLITE_PRAGMAS = (
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64 MiB page cache
+)
+# Applied when [sqlite_database] wal_mode is enabled. WAL lets readers (e.g.
+# reporting tools) keep working during an import and makes each file's COMMIT
+# a sequential append; with WAL, synchronous=NORMAL cannot corrupt the
+# database (a power loss may only roll back the most recent commits). The
+# journal mode is stored in the database file, and WAL needs -wal/-shm files
+# in a directory writable by every process opening it, so it is opt-in.
+SQLITE_WAL_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+)
+
 
 class LockError(Exception):
     """Custom exception for lock acquisition failures."""
@@ -119,12 +135,15 @@ class FileLock:
         self.release()
 
 
-def get_db_connection(db_path: Path) -> sqlite3.Connection:
+def get_db_connection(db_path: Path, wal_mode: bool = False) -> sqlite3.Connection:
     """
     Establishes a connection to the SQLite database.
 
     Args:
         db_path: Path to the SQLite database file.
+        wal_mode: If True, put the database in WAL journal mode with
+                  synchronous=NORMAL; otherwise a database left in WAL mode
+                  is switched back to the rollback journal when possible.
 
     Returns:
         An sqlite3.Connection object.
@@ -133,12 +152,19 @@ def get_db_connection(db_path: Path) -> sqlite3.Connection:
         DatabaseError: If the connection cannot be established.
     """
     logger.debug(f"{LOG_PREFIX_DB}: Connecting to database: {db_path}")
+    conn: Optional[sqlite3.Connection] = None
     try:
         db_path.parent.mkdir(parents=True, exist_ok=True)
         conn = sqlite3.connect(str(db_path), timeout=10)  # Increased timeout
+        for pragma in SQLITE_PRAGMAS + (SQLITE_WAL_PRAGMAS if wal_mode else ()):
+            conn.execute(pragma)
+        if not wal_mode:
+            _leave_wal_mode(conn, db_path)
         logger.info(f"{LOG_PREFIX_DB}: Successfully connected to database: {db_path}")
         return conn
     except sqlite3.Error as e:
+        if conn is not None:
+            conn.close()
         logger.error(
             f"{LOG_PREFIX_DB}: Failed to connect to database {db_path}: {e}",
             exc_info=True,
@@ -146,6 +172,27 @@ def get_db_connection(db_path: Path) -> sqlite3.Connection:
         raise DatabaseError(f"Could not connect to SQLite database: {e}")
 
 
+def _leave_wal_mode(conn: sqlite3.Connection, db_path: Path) -> None:
+    """
+    Switches a database left in WAL mode back to the rollback journal.
+
+    Leaving WAL needs exclusive access, so with a reader attached this fails;
+    the import then simply runs in WAL mode and the switch is retried on the
+    next run. Databases not in WAL mode are left untouched.
+    """
+    if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal":
+        return
+    try:
+        mode = conn.execute("PRAGMA journal_mode=DELETE").fetchone()[0]
+    except sqlite3.Error as e:
+        mode = str(e)
+    if mode.lower() != "delete":
+        logger.warning(
+            f"{LOG_PREFIX_DB}: Could not switch {db_path} out of WAL mode "
+            f"({mode}); importing in WAL mode and retrying on the next run."
+        )
+
+
 def create_table_if_not_exists(
     conn: sqlite3.Connection, table_name: str, column_mapping_file: Path
 ) -> None:
@@ -389,7 +436,7 @@ def run_sql_import(config: AppConfig, output_log_level: str = "INFO") -> bool:
             retries = 0
             while retries <= MAX_RETRIES:
                 try:
-                    conn = get_db_connection(db_path)
+                    conn = get_db_connection(db_path, config.sqlite_wal_mode)
                     # Ensure table exists
                     create_table_if_not_exists(
                         conn, table_name, final_mapping_file_path
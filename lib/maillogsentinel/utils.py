@@ -7,12 +7,15 @@ This module includes a variety of helper functions for tasks such as:
 - Configuring application logging with rotating file handlers.
 - Reading and writing the application's state (e.g., last log offset).
 - Listing mail log files, including rotated and gzipped versions.
+- Moving files across filesystems without a userspace copy.
 - Checking if a file is gzipped based on its extension.
 
 Constants for filenames (state, log) and log level mappings are also defined here.
 """
 
+import errno
 import os
+import shutil
 import sys
 
 import logging
@@ -88,11 +91,9 @@ def setup_paths(app_config: "config.AppConfig") -> Tuple[Path, Path, Path, Path,
         # This could be more sophisticated, perhaps checking if the parent is
         # a common root like /var/lib and skipping mkdir in those cases, or
         # relying on the application/user to ensure system paths are valid.
-        db_paths_to_check_parents_for = []
-        if country_db_path:
-            db_paths_to_check_parents_for.append(country_db_path)
-        if asn_db_path:
-            db_paths_to_check_parents_for.append(asn_db_path)
+        db_paths_to_check_parents_for = [
+            db_path for db_path in (country_db_path, asn_db_path) if db_path
+        ]
 
         for db_path in db_paths_to_check_parents_for:
             parent_dir = db_path.parent
@@ -211,13 +212,18 @@ def setup_logging(app_config: "config.AppConfig") -> logging.Logger:
     return logger
 
 
-def read_state(statedir: Path, logger: Optional[logging.Logger] = None) -> int:
+def read_state_with_inode(
+    statedir: Path, logger: Optional[logging.Logger] = None
+) -> Tuple[int, Optional[int]]:
     """
-    Reads the last processed log offset from the state file.
+    Reads the last processed log offset and log inode from the state file.
 
     The state file (typically "state.offset") is located in `statedir`.
-    It's expected to contain a single integer representing the byte offset
-    up to which the main mail log file was processed in the previous run.
+    It contains the byte offset up to which the main mail log file was
+    processed in the previous run, optionally followed by the inode number of
+    that file. The inode lets callers notice a rotated log even when the new
+    file has already grown past the old offset. State files written by older
+    versions only hold the offset.
 
     Args:
         statedir: The `Path` object for the directory containing the state file.
@@ -225,16 +231,19 @@ def read_state(statedir: Path, logger: Optional[logging.Logger] = None) -> int:
                 the state file cannot be read or parsed.
 
     Returns:
-        The offset read from the state file as an integer.
-        Returns 0 if the state file does not exist, cannot be read, or
-        contains an invalid value.
+        A tuple (offset, inode). The offset is 0 and the inode None if the
+        state file does not exist, cannot be read, or contains an invalid
+        value. The inode is None if the state file does not record one.
     """
     state_file = statedir / STATE_FILENAME
     if not state_file.is_file():
-        return 0
+        return 0, None
     try:
-        return int(state_file.read_text().strip())
-    except (IOError, ValueError) as e:
+        fields = state_file.read_text().split()
+        offset = int(fields[0])
+        inode = int(fields[1]) if len(fields) > 1 else None
+        return offset, inode
+    except (IOError, ValueError, IndexError) as e:
         if logger:
             logger.warning(
                 f"Failed to read state from {state_file}: {e}. Assuming offset 0."
@@ -245,16 +254,44 @@ def read_state(statedir: Path, logger: Optional[logging.Logger] = None) -> int:
                 f"Assuming offset 0.",
                 file=sys.stderr,
             )
-        return 0
+        return 0, None
+
+
+def read_state(statedir: Path, logger: Optional[logging.Logger] = None) -> int:
+    """
+    Reads the last processed log offset from the state file.
+
+    See `read_state_with_inode`; this returns only the offset.
+
+    Args:
+        statedir: The `Path` object for the directory containing the state file.
+        logger: An optional `logging.Logger` instance for warning messages if
+                the state file cannot be read or parsed.
+
+    Returns:
+        The offset read from the state file as an integer.
+        Returns 0 if the state file does not exist, cannot be read, or
+        contains an invalid value.
+    """
+    return read_state_with_inode(statedir, logger)[0]
 
 
-def write_state(statedir: Path, offset: int, logger: logging.Logger) -> None:
+def write_state(
+    statedir: Path,
+    offset: int,
+    logger: logging.Logger,
+    inode: Optional[int] = None,
+) -> None:
     """
     Writes the current log offset to the state file.
 
     The state file (typically "state.offset") is created/overwritten in `statedir`
     with the provided `offset` value. This offset represents the point up to
-    which the main mail log has been processed.
+    which the main mail log has been processed. The value is written to a
+    temporary file, synced and renamed over the state file, so a crash never
+    leaves a truncated offset behind. If the state file already holds the
+    same value (nothing new was logged), it is left untouched and no sync
+    is done.
 
     Args:
         statedir: The `Path` object for the directory where the state file
@@ -262,10 +299,24 @@ def write_state(statedir: Path, offset: int, logger: logging.Logger) -> None:
         offset: The integer offset value to write to the state file.
         logger: A `logging.Logger` instance for error messages if the state
                 file cannot be written.
+        inode: Optional inode number of the main mail log the offset refers
+               to. Stored after the offset when given.
     """
     state_file = statedir / STATE_FILENAME
+    tmp_state_file = state_file.with_name(state_file.name + ".tmp")
+    state = (str(offset) if inode is None else f"{offset} {inode}").encode("ascii")
+    try:
+        if state_file.read_bytes() == state:
+            return
+    except OSError:
+        pass  # Missing or unreadable; write it below
     try:
-        state_file.write_text(str(offset))
+        with open(tmp_state_file, "wb") as f:
+            f.write(state)
+            f.flush()
+            # Data and size are all that matter; skip the timestamp update.
+            getattr(os, "fdatasync", os.fsync)(f.fileno())
+        os.replace(tmp_state_file, state_file)
     except IOError as e:
         logger.error(f"Failed to write state to {state_file}: {e}")
 
@@ -277,21 +328,36 @@ def list_all_logs(maillog: Path) -> List[Path]:
     This function finds the specified main log file (`maillog`) and any
     rotated versions of it in the same directory. Rotated files are
     expected to follow common naming patterns like `maillog.0`, `maillog.1.gz`, etc.
-    The list is sorted, typically meaning older logs come first.
+    Rotated files are ordered by modification time, newest first, so that
+    `maillog.2` comes before `maillog.10`.
 
     Args:
         maillog: The `Path` object representing the main mail log file.
 
     Returns:
         A list of `Path` objects, including `maillog` (if it exists and is a file)
-        and all its found rotated versions that are files. The list is sorted.
+        followed by all its found rotated versions that are files, newest first.
     """
-    files = []
-    if maillog.is_file():
-        files.append(maillog)
-    if maillog.parent.exists():
-        files.extend(sorted(list(maillog.parent.glob(maillog.name + ".*"))))
-    return [p for p in files if p.is_file()]
+    files = [maillog] if maillog.is_file() else []
+    # A single directory scan; DirEntry.is_file() answers from the cached
+    # directory entry type, and only matching files are stat()ed for mtime.
+    prefix = maillog.name + "."
+    rotated = []
+    try:
+        with os.scandir(maillog.parent) as entries:
+            for entry in entries:
+                if not (entry.name.startswith(prefix) and entry.is_file()):
+                    continue
+                try:
+                    rotated.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue  # Removed by logrotate since the scan; skip it
+    except FileNotFoundError:
+        pass  # The log directory itself does not exist
+    # Newest first, like the main log: mail.log.2 comes before mail.log.10.
+    rotated.sort(key=lambda mtime_path: (-mtime_path[0], mtime_path[1]))
+    files.extend(Path(p) for _, p in rotated)
+    return files
 
 
 def is_gzip(path: Path) -> bool:
@@ -305,3 +371,78 @@ def is_gzip(path: Path) -> bool:
         True if the file name ends with ".gz", False otherwise.
     """
     return path.name.endswith(".gz")
+
+
+def move_file(src: Path, dst: Path) -> None:
+    """
+    Moves the file `src` to `dst`.
+
+    A plain rename is tried first. When `src` and `dst` are on different
+    filesystems (`EXDEV`), the data is copied in the kernel with
+    `os.copy_file_range` (falling back to `shutil.copyfileobj` where that
+    is unavailable or unsupported for the two filesystems), metadata is
+    copied over and `src` is removed. A failed or short copy removes the
+    partial `dst` and leaves `src` in place.
+
+    Args:
+        src: The `Path` of the file to move.
+        dst: The destination `Path` (including the file name).
+
+    Raises:
+        OSError: If the file cannot be renamed, copied or removed.
+    """
+    try:
+        os.rename(src, dst)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            _copy_file_data(fsrc, fdst)
+            fdst.flush()
+            src_size = os.fstat(fsrc.fileno()).st_size
+            dst_size = os.fstat(fdst.fileno()).st_size
+            if dst_size != src_size:
+                raise OSError(
+                    errno.EIO,
+                    f"Short copy of {src} to {dst}: {dst_size} of {src_size} bytes",
+                )
+        shutil.copystat(src, dst)
+    except BaseException:
+        # Do not leave a partial copy behind; src is still intact.
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+        raise
+    os.unlink(src)
+
+
+# copy_file_range errors meaning "not supported for this pair of files", e.g.
+# across filesystems on kernels before 5.3 or without shared copy support.
+_COPY_FILE_RANGE_UNSUPPORTED = {
+    errno.EXDEV,
+    errno.EOPNOTSUPP,
+    errno.ENOSYS,
+    errno.EINVAL,
+}
+
+
+def _copy_file_data(fsrc, fdst) -> None:
+    """Copies fsrc to fdst in the kernel if possible, else through userspace."""
+    if hasattr(os, "copy_file_range"):
+        try:
+            copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30)
+        except OSError as e:
+            if e.errno not in _COPY_FILE_RANGE_UNSUPPORTED:
+                raise
+        else:
+            # Some filesystems report 0 bytes copied instead of failing;
+            # only trust a 0 when the source really is empty.
+            if copied or os.fstat(fsrc.fileno()).st_size == 0:
+                while copied:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30)
+                return
+    shutil.copyfileobj(fsrc, fdst)
@@ -0,0 +1,38 @@
+import logging
+import unittest
+from unittest.mock import MagicMock, patch
+
+import bin.maillogsentinel as mls
+from lib.maillogsentinel import dns_utils
+
+
+class TestReverseDnsPrefetchFunc(unittest.TestCase):
+    def setUp(self):
+        self.logger = MagicMock(spec=logging.Logger)
+
+    def _prefetch_func(self, enabled, cache):
+        with patch.dict(dns_utils.DNS_CACHE_SETTINGS, {"enabled": enabled}), patch(
+            "lib.maillogsentinel.dns_utils.DNS_CACHE", cache
+        ):
+            return mls._reverse_dns_prefetch_func(self.logger)
+
+    def test_no_callback_when_cache_disabled(self):
+        self.assertIsNone(self._prefetch_func(False, None))
+
+    def test_no_callback_when_cache_holds_nothing(self):
+        for size in (0, -1):
+            cache = dns_utils.ReverseLookupCache(max_size=size, ttl=60, negative_ttl=60)
+            with self.subTest(size=size):
+                self.assertIsNone(self._prefetch_func(True, cache))
+
+    def test_callback_when_cache_enabled(self):
+        cache = dns_utils.ReverseLookupCache(max_size=8, ttl=60, negative_ttl=60)
+        func = self._prefetch_func(True, cache)
+        self.assertIsNotNone(func)
+        with patch.object(mls, "prefetch_reverse_lookups") as mock_prefetch:
+            func({"1.1.1.1"})
+        mock_prefetch.assert_called_once_with({"1.1.1.1"}, self.logger)
+
+
+if __name__ == "__main__":
+    unittest.main()
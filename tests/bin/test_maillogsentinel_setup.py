@@ -64,10 +64,12 @@ ip_update_schedule = weekly
 class TestNonInteractiveSetupConfig(unittest.TestCase):
 
     def setUp(self):
-        self.mock_log_fh = MagicMock(spec=io.StringIO)
+        self.mock_log_fh = MagicMock(spec=io.BytesIO)
         self.mock_log_fh.closed = False
         mls_setup.backed_up_items = []
         mls_setup.created_final_paths = []
+        mls_setup._calendar_cache.clear()
+        mls_setup._which.cache_clear()
 
     def test_non_interactive_setup_valid_config_parsing(self):
         """Test that a valid config is read and initial checks pass for a full successful run."""
@@ -1248,9 +1250,9 @@ class TestNonInteractiveSetupConfig(unittest.TestCase):
                     # print(f"  Call {i+1}: Arg = {path_arg_display}, Returned = {call_log_item['returned']}")
                     # print("\nDEBUG move_calls_log (from finally):", move_calls_log)
                     # print("DEBUG mls_setup.backed_up_items (from finally):", mls_setup.backed_up_items)
-                    log_writes = "".join(
+                    log_writes = b"".join(
                         call.args[0] for call in self.mock_log_fh.write.call_args_list
-                    )
+                    ).decode("utf-8")
                     # print("DEBUG Log content (from finally):", log_writes)
 
                 if not sut_stopped_by_exception:
@@ -1473,50 +1475,16 @@ class TestNonInteractiveSetupConfig(unittest.TestCase):
                     capture_output=True,
                     text=True,
                 ),
+                # All timers are enabled with a single systemctl call
                 unittest.mock.call(
                     [
                         "/usr/bin/systemctl",
                         "enable",
                         "--now",
                         "maillogsentinel-extract.timer",
-                    ],
-                    check=True,
-                    capture_output=True,
-                    text=True,
-                ),
-                unittest.mock.call(
-                    [
-                        "/usr/bin/systemctl",
-                        "enable",
-                        "--now",
                         "maillogsentinel-report.timer",
-                    ],
-                    check=True,
-                    capture_output=True,
-                    text=True,
-                ),
-                unittest.mock.call(
-                    ["/usr/bin/systemctl", "enable", "--now", "ipinfo-update.timer"],
-                    check=True,
-                    capture_output=True,
-                    text=True,
-                ),
-                unittest.mock.call(
-                    [
-                        "/usr/bin/systemctl",
-                        "enable",
-                        "--now",
+                        "ipinfo-update.timer",
                         "maillogsentinel-sql-export.timer",
-                    ],
-                    check=True,
-                    capture_output=True,
-                    text=True,
-                ),
-                unittest.mock.call(
-                    [
-                        "/usr/bin/systemctl",
-                        "enable",
-                        "--now",
                         "maillogsentinel-sql-import.timer",
                     ],
                     check=True,
@@ -1535,13 +1503,9 @@ class TestNonInteractiveSetupConfig(unittest.TestCase):
 
             # Reconstructing expected_calls based on the actual flow in non_interactive_setup:
             # 1. usermod
-            # 2. validate_calendar_expression for sql_export_schedule_str
-            # 3. validate_calendar_expression for sql_import_schedule_str
-            # 4. validate_calendar_expression for extraction_schedule_str
-            # 5. validate_calendar_expression for report_on_calendar
-            # 6. validate_calendar_expression for ip_update_schedule_str
-            # 7. systemctl daemon-reload
-            # 8. systemctl enable for timers (extract, report, ipinfo, sql-export, sql-import)
+            # 2. validate_calendar_expressions_batch for all schedules
+            # 3. systemctl daemon-reload
+            # 4. systemctl enable for all timers (extract, report, ipinfo, sql-export, sql-import)
 
             current_config = configparser.ConfigParser()
             current_config.read_string(
@@ -1550,52 +1514,6 @@ class TestNonInteractiveSetupConfig(unittest.TestCase):
 
             expected_calls = [expected_systemctl_calls[0]]  # usermod
 
-            # Add calendar validation calls in the order they appear in non_interactive_setup
-            expected_calls.append(
-                unittest.mock.call(
-                    [
-                        "/usr/bin/systemd-analyze",
-                        "calendar",
-                        "--iterations=1",
-                        current_config.get(
-                            "sql_export_systemd", "frequency", fallback="*:0/4"
-                        ),
-                    ],
-                    capture_output=True,
-                    text=True,
-                    check=False,
-                )
-            )
-            expected_calls.append(
-                unittest.mock.call(
-                    [
-                        "/usr/bin/systemd-analyze",
-                        "calendar",
-                        "--iterations=1",
-                        current_config.get(
-                            "sql_import_systemd", "frequency", fallback="*:0/5"
-                        ),
-                    ],
-                    capture_output=True,
-                    text=True,
-                    check=False,
-                )
-            )
-            expected_calls.append(
-                unittest.mock.call(
-                    [
-                        "/usr/bin/systemd-analyze",
-                        "calendar",
-                        "--iterations=1",
-                        current_config.get(
-                            "systemd", "extraction_schedule", fallback="hourly"
-                        ),
-                    ],
-                    capture_output=True,
-                    text=True,
-                    check=False,
-                )
-            )
             # report_schedule logic: 'daily' -> '*-*-* 23:59:00' or 'HH:MM' -> '*-*-* HH:MM:00'
             report_schedule_raw = current_config.get(
                 "systemd", "report_schedule", fallback="daily"
@@ -1612,31 +1530,30 @@ class TestNonInteractiveSetupConfig(unittest.TestCase):
                     report_schedule_raw  # Assume it's a complex valid string
                 )
 
+            # All schedules are validated with a single systemd-analyze call,
+            # in the order they appear in non_interactive_setup
             expected_calls.append(
                 unittest.mock.call(
                     [
                         "/usr/bin/systemd-analyze",
                         "calendar",
                         "--iterations=1",
+                        current_config.get(
+                            "sql_export_systemd", "frequency", fallback="*:0/4"
+                        ),
+                        current_config.get(
+                            "sql_import_systemd", "frequency", fallback="*:0/5"
+                        ),
+                        current_config.get(
+                            "systemd", "extraction_schedule", fallback="hourly"
+                        ),
                         report_schedule_validated,
-                    ],
-                    capture_output=True,
-                    text=True,
-                    check=False,
-                )
-            )
-            expected_calls.append(
-                unittest.mock.call(
-                    [
-                        "/usr/bin/systemd-analyze",
-                        "calendar",
-                        "--iterations=1",
                         current_config.get(
                             "systemd", "ip_update_schedule", fallback="weekly"
                         ),
                     ],
-                    capture_output=True,
-                    text=True,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
                     check=False,
                 )
             )
@@ -1881,20 +1798,184 @@ class TestNonInteractiveSetupConfig(unittest.TestCase):
             )
 
 
+class TestGenerateSystemdUnitsContent(unittest.TestCase):
+    def test_unit_contents(self):
+        units = mls_setup._generate_systemd_units_content(
+            "mls",
+            "/usr/bin/python3",
+            "/usr/local/bin/maillogsentinel.py",
+            "/etc/maillogsentinel.conf",
+            "/var/log/maillogsentinel",
+            "hourly",
+            "*-*-* 23:59:00",
+            "weekly",
+            "/usr/local/bin/ipinfo.py",
+            "*:0/4",
+            "*:0/5",
+        )
+        self.assertEqual(len(units), 10)
+        self.assertEqual(
+            units["maillogsentinel-report.service"],
+            "[Unit]\nDescription=MailLogSentinel Daily Report Service\n"
+            "After=network.target\n\n[Service]\nType=oneshot\nUser=mls\n"
+            "ExecStart=/usr/bin/python3 /usr/local/bin/maillogsentinel.py "
+            "--config /etc/maillogsentinel.conf --report\n"
+            "WorkingDirectory=/var/log/maillogsentinel\n"
+            "StandardOutput=journal\nStandardError=journal\n\n"
+            "[Install]\nWantedBy=multi-user.target\n",
+        )
+        self.assertEqual(
+            units["maillogsentinel-extract.timer"],
+            "[Unit]\nDescription=Run MailLogSentinel Log Extraction periodically\n\n"
+            "[Timer]\nUnit=maillogsentinel.service\nOnCalendar=hourly\n"
+            "Persistent=true\n\n[Install]\nWantedBy=timers.target\n",
+        )
+        self.assertIn(
+            "ExecStart=/usr/bin/python3 /usr/local/bin/ipinfo.py --update "
+            "--config /etc/maillogsentinel.conf\n",
+            units["ipinfo-update.service"],
+        )
+        self.assertNotIn("WorkingDirectory=", units["ipinfo-update.service"])
+        self.assertIn("OnCalendar=*:0/5\n", units["maillogsentinel-sql-import.timer"])
+
+
+class TestEnableSystemdTimers(unittest.TestCase):
+    timers = ["a.timer", "b.timer", "c.timer"]
+
+    @patch("bin.maillogsentinel_setup.subprocess.run")
+    def test_single_call_success(self, mock_subprocess_run):
+        self.assertEqual(
+            mls_setup._enable_systemd_timers("/usr/bin/systemctl", self.timers),
+            ([], None),
+        )
+        mock_subprocess_run.assert_called_once_with(
+            ["/usr/bin/systemctl", "enable", "--now", *self.timers],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+
+    @patch("bin.maillogsentinel_setup.subprocess.run")
+    def test_failure_reports_unconfirmed_units(self, mock_subprocess_run):
+        error = subprocess.CalledProcessError(
+            1, "systemctl", stderr="Failed to start b.timer: Unit is masked."
+        )
+        mock_subprocess_run.side_effect = [
+            error,
+            MagicMock(stdout="enabled\nmasked\nenabled\n"),
+            MagicMock(stdout="active\ninactive\ninactive\n"),
+        ]
+        self.assertEqual(
+            mls_setup._enable_systemd_timers("/usr/bin/systemctl", self.timers),
+            (["b.timer", "c.timer"], error),
+        )
+        mock_subprocess_run.assert_any_call(
+            ["/usr/bin/systemctl", "is-enabled", *self.timers],
+            capture_output=True,
+            text=True,
+        )
+        mock_subprocess_run.assert_any_call(
+            ["/usr/bin/systemctl", "is-active", *self.timers],
+            capture_output=True,
+            text=True,
+        )
+
+    @patch("bin.maillogsentinel_setup.subprocess.run")
+    def test_unreadable_state_fails_all_units(self, mock_subprocess_run):
+        error = subprocess.CalledProcessError(1, "systemctl", stderr="D-Bus error")
+        mock_subprocess_run.side_effect = [error, MagicMock(stdout="")]
+        self.assertEqual(
+            mls_setup._enable_systemd_timers("/usr/bin/systemctl", self.timers),
+            (self.timers, error),
+        )
+
+    @patch("bin.maillogsentinel_setup.subprocess.run")
+    def test_state_query_error_fails_all_units(self, mock_subprocess_run):
+        error = subprocess.CalledProcessError(1, "systemctl", stderr="D-Bus error")
+        mock_subprocess_run.side_effect = [error, OSError("exec failed")]
+        self.assertEqual(
+            mls_setup._enable_systemd_timers("/usr/bin/systemctl", self.timers),
+            (self.timers, error),
+        )
+
+
+class TestGetCliInput(unittest.TestCase):
+    def setUp(self):
+        self.mock_log_fh = MagicMock(spec=io.BytesIO)
+        self.mock_log_fh.closed = False
+
+    @patch("bin.maillogsentinel_setup._setup_print_and_log")
+    def test_retries_until_valid(self, mock_print_log):
+        cases = [
+            (
+                {"allowed_values": ["DEBUG", "INFO"]},
+                ["verbose", "debug"],
+                "debug",
+                "Error: Invalid input. Must be one of DEBUG, INFO. Please try again.",
+            ),
+            (
+                {"is_bool": True},
+                ["maybe", "Y"],
+                "True",
+                "Error: Please answer 'y' or 'n'. Please try again.",
+            ),
+            (
+                {"is_int": True, "int_non_negative": True},
+                ["-1", "42"],
+                "42",
+                "Error: Value must be a non-negative integer. Please try again.",
+            ),
+            (
+                {"is_int": True},
+                ["abc", "-3"],
+                "-3",
+                "Error: Value must be an integer. Please try again.",
+            ),
+            (
+                {"is_email": True},
+                ["nobody", "admin@example.org"],
+                "admin@example.org",
+                "Error: Invalid email format. Please try again.",
+            ),
+        ]
+        for kwargs, answers, expected, error in cases:
+            with self.subTest(kwargs=kwargs), patch(
+                "builtins.input", side_effect=answers
+            ):
+                mock_print_log.reset_mock()
+                result = mls_setup._get_cli_input(
+                    "Prompt", "", self.mock_log_fh, **kwargs
+                )
+                self.assertEqual(result, expected)
+                mock_print_log.assert_any_call(error, self.mock_log_fh)
+
+    @patch("builtins.input", return_value="")
+    @patch("bin.maillogsentinel_setup._setup_print_and_log")
+    def test_empty_input_uses_default(self, mock_print_log, mock_input):
+        self.assertEqual(
+            mls_setup._get_cli_input(
+                "Prompt", "/var/log", self.mock_log_fh, is_path=True
+            ),
+            "/var/log",
+        )
+
+
 class TestValidateCalendarExpression(unittest.TestCase):
     def setUp(self):
-        self.mock_log_fh = MagicMock(spec=io.StringIO)
+        self.mock_log_fh = MagicMock(spec=io.BytesIO)
         self.mock_log_fh.closed = False
         # Ensure we have a clean slate for any global lists if the function were to modify them
         # (it doesn't, but good practice if it did)
         mls_setup.backed_up_items = []
         mls_setup.created_final_paths = []
+        mls_setup._calendar_cache.clear()
+        mls_setup._which.cache_clear()
 
     @patch("bin.maillogsentinel_setup.shutil.which")
     @patch("bin.maillogsentinel_setup.subprocess.run")
     def test_valid_expressions(self, mock_subprocess_run, mock_shutil_which):
         mock_shutil_which.return_value = "/usr/bin/systemd-analyze"
-        mock_subprocess_run.return_value = MagicMock(returncode=0, stderr="")
+        mock_subprocess_run.return_value = MagicMock(returncode=0, stderr=b"")
 
         valid_expressions = [
             "*:0/4",
@@ -1913,8 +1994,8 @@ class TestValidateCalendarExpression(unittest.TestCase):
                 self.assertEqual(result, expr)
                 mock_subprocess_run.assert_called_with(
                     ["/usr/bin/systemd-analyze", "calendar", "--iterations=1", expr],
-                    capture_output=True,
-                    text=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
                     check=False,
                 )
 
@@ -1926,7 +2007,7 @@ class TestValidateCalendarExpression(unittest.TestCase):
     ):
         mock_shutil_which.return_value = "/usr/bin/systemd-analyze"
         mock_subprocess_run.return_value = MagicMock(
-            returncode=1, stderr="Invalid format"
+            returncode=1, stderr=b"Invalid format"
         )
         fallback = "hourly"
 
@@ -2022,6 +2103,82 @@ class TestValidateCalendarExpression(unittest.TestCase):
             self.mock_log_fh,
         )
 
+    @patch("bin.maillogsentinel_setup.shutil.which")
+    @patch("bin.maillogsentinel_setup.subprocess.run")
+    @patch("bin.maillogsentinel_setup._setup_print_and_log")
+    def test_repeated_expressions_use_cache(
+        self, mock_print_log, mock_subprocess_run, mock_shutil_which
+    ):
+        mock_shutil_which.return_value = "/usr/bin/systemd-analyze"
+        mock_subprocess_run.side_effect = lambda cmd, **kwargs: MagicMock(
+            returncode=0 if cmd[-1] == "hourly" else 1, stderr=b"Invalid format"
+        )
+        for _ in range(3):
+            self.assertEqual(
+                mls_setup.validate_calendar_expression(
+                    "hourly", self.mock_log_fh, "daily"
+                ),
+                "hourly",
+            )
+            self.assertEqual(
+                mls_setup.validate_calendar_expression(
+                    "bogus", self.mock_log_fh, "daily"
+                ),
+                "daily",
+            )
+        self.assertEqual(mock_subprocess_run.call_count, 2)
+        mock_print_log.assert_any_call(
+            "WARNING: Invalid Systemd OnCalendar expression: 'bogus'. Error: Invalid format. Falling back to default: daily",
+            self.mock_log_fh,
+        )
+
+    @patch("bin.maillogsentinel_setup.shutil.which")
+    @patch("bin.maillogsentinel_setup.subprocess.run")
+    def test_batch_validation_single_subprocess(
+        self, mock_subprocess_run, mock_shutil_which
+    ):
+        mock_shutil_which.return_value = "/usr/bin/systemd-analyze"
+        mock_subprocess_run.return_value = MagicMock(
+            returncode=1,
+            stdout=(
+                b"  Original form: hourly\n"
+                b"Normalized form: *-*-* *:00:00\n"
+                b"    Next elapse: Mon 2025-01-06 11:00:00 UTC\n\n"
+                b"  Original form: *:0/4\n"
+                b"Normalized form: *-*-* *:00/4:00\n"
+            ),
+            stderr=b"Failed to parse calendar specification 'bogus': Invalid argument",
+        )
+        result = mls_setup.validate_calendar_expressions_batch(
+            ["hourly", "bogus", "*:0/4", "hourly", ""], self.mock_log_fh
+        )
+        self.assertEqual(result, {"hourly": True, "bogus": False, "*:0/4": True})
+        mock_subprocess_run.assert_called_once_with(
+            [
+                "/usr/bin/systemd-analyze",
+                "calendar",
+                "--iterations=1",
+                "hourly",
+                "bogus",
+                "*:0/4",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+        with patch("bin.maillogsentinel_setup._setup_print_and_log") as mock_log:
+            self.assertEqual(
+                mls_setup.validate_calendar_expression(
+                    "bogus", self.mock_log_fh, "daily"
+                ),
+                "daily",
+            )
+            mock_log.assert_any_call(
+                "WARNING: Invalid Systemd OnCalendar expression: 'bogus'. Error: Failed to parse calendar specification 'bogus': Invalid argument. Falling back to default: daily",
+                self.mock_log_fh,
+            )
+        mock_subprocess_run.assert_called_once()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -168,6 +168,24 @@ log_file_max_bytes = not_an_int
     )
 
 
+def test_negative_parse_workers_falls_back_to_default(
+    tmp_path: Path, mock_logger: MagicMock
+):
+    """A negative parse_workers would make the worker pool raise ValueError."""
+    content = """
+[general]
+parse_workers = -2
+"""
+    config_file = create_config_file(tmp_path, content)
+    config = AppConfig(config_file, logger=mock_logger)
+
+    assert config.parse_workers == DEFAULT_CONFIG["general"]["parse_workers"]
+    mock_logger.warning.assert_called_with(
+        "Invalid negative value -2 for [general]parse_workers. "
+        f"Using fallback {DEFAULT_CONFIG['general']['parse_workers']}."
+    )
+
+
 def test_get_bool_value_error(tmp_path: Path, mock_logger: MagicMock):
     """Test _get_bool when config value is not a valid boolean."""
     content = """
@@ -298,6 +316,7 @@ def test_appconfig_new_sections_defaults(tmp_path: Path, mock_logger: MagicMock)
         == DEFAULT_CONFIG["sqlite_database"]["password_hash"]
     )
     assert config.sqlite_salt == DEFAULT_CONFIG["sqlite_database"]["salt"]
+    assert config.sqlite_wal_mode is False
 
     # Check defaults for [sql_export_systemd]
     assert (
@@ -327,6 +346,7 @@ def test_appconfig_new_sections_from_file(tmp_path: Path, mock_logger: MagicMock
 db_type = test_sqlite
 db_path = /tmp/test.db
 user = test_user
+wal_mode = true
 # password_hash and salt would be set by setup, not typically in a raw config by user for SQLite
 
 [sql_export_systemd]
@@ -348,6 +368,7 @@ table_name = my_event_log
     assert config.sqlite_db_type == "test_sqlite"
     assert config.sqlite_db_path == Path("/tmp/test.db")
     assert config.sqlite_user == "test_user"
+    assert config.sqlite_wal_mode is True
     # password_hash and salt will be empty string if not in file, as per _get_str default behavior with DEFAULT_CONFIG
     assert (
         config.sqlite_password_hash
@@ -0,0 +1,36 @@
+from unittest.mock import patch
+
+from lib.maillogsentinel.dns_utils import ReverseLookupCache
+
+LOOKUP = "lib.maillogsentinel.dns_utils._perform_actual_reverse_lookup"
+
+
+def test_reverse_lookup_cache_hits_and_eviction():
+    cache = ReverseLookupCache(max_size=2, ttl=3600, negative_ttl=60)
+    with patch(LOOKUP, side_effect=lambda ip: (f"host-{ip}", None)) as lookup:
+        assert cache.lookup("1.1.1.1") == ("host-1.1.1.1", None)
+        assert cache.lookup("1.1.1.1") == ("host-1.1.1.1", None)
+        cache.lookup("2.2.2.2")
+        cache.lookup("3.3.3.3")  # Evicts 1.1.1.1, the least recently used
+        cache.lookup("1.1.1.1")
+    assert lookup.call_count == 4
+    assert (cache.hits, cache.misses) == (1, 4)
+    assert len(cache) == 2
+
+
+def test_reverse_lookup_cache_expires_failures_sooner():
+    cache = ReverseLookupCache(max_size=10, ttl=3600, negative_ttl=60)
+    results = {"1.1.1.1": ("host.example", None), "2.2.2.2": (None, "ERRNO 1")}
+    with patch(LOOKUP, side_effect=results.get) as lookup, patch(
+        "lib.maillogsentinel.dns_utils.time.monotonic", return_value=1000.0
+    ) as now:
+        cache.lookup("1.1.1.1")
+        cache.lookup("2.2.2.2")
+        now.return_value = 1000.0 + 120  # Past the negative TTL only
+        assert cache.lookup("1.1.1.1") == ("host.example", None)
+        assert cache.lookup("2.2.2.2") == (None, "ERRNO 1")
+    assert [c.args[0] for c in lookup.call_args_list] == [
+        "1.1.1.1",
+        "2.2.2.2",
+        "2.2.2.2",
+    ]
@@ -5,6 +5,8 @@ from datetime import datetime
 
 # Import the function to be tested
 from lib.maillogsentinel.log_utils import (
+    PARSED_FIELDS,
+    _parse_log_fields,
     _parse_log_line,
 )  # MONTHS needed for test_parse_log_line_invalid_month by implication
 
@@ -169,3 +171,71 @@ def test_parse_log_line_username_with_newline(
     )
     assert result is not None
     assert result["user"] == "user name"  # Newline replaced with space
+
+
+def test_parse_log_line_without_sasl_marker_skips_lookups(
+    current_year, mock_logger, mock_ip_info_mgr, mock_reverse_lookup_func
+):
+    log_line = "Jan  1 12:00:00 server postfix/smtpd[123]: connect from unknown[1.2.3.4]"
+    assert (
+        _parse_log_line(
+            log_line,
+            current_year,
+            mock_logger,
+            mock_ip_info_mgr,
+            mock_reverse_lookup_func,
+        )
+        is None
+    )
+    mock_reverse_lookup_func.assert_not_called()
+    mock_ip_info_mgr.lookup_ip_info.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "log_line",
+    [
+        "Jan  1 12:00:00 server postfix/smtpd[123]: client=unknown[1.2.3.4], sasl_username=test@example.com",
+        "Dec 31 23:59:59 mx1 postfix/smtpd[9]: warning: unknown[5.6.7.8]: SASL LOGIN authentication failed, sasl_username=bob",
+        "Foo  1 12:00:00 server postfix/smtpd[123]: client=unknown[1.2.3.4], sasl_username=bad_month",
+        " Jan  1 12:00:00 server postfix/smtpd[123]: client=unknown[1.2.3.4], sasl_username=leading_space",
+        "Jan 123 12:00:00 server postfix/smtpd[123]: client=unknown[1.2.3.4], sasl_username=long_day",
+        "Jan  1 12:00 server postfix/smtpd[123]: client=unknown[1.2.3.4], sasl_username=short_time",
+        "Jan  1 12:00:00 sasl_username=no_ip",
+    ],
+)
+def test_parse_log_line_split_matches_legacy_regex(
+    log_line, current_year, mock_logger, mock_ip_info_mgr, mock_reverse_lookup_func
+):
+    results = [
+        _parse_log_line(
+            log_line,
+            current_year,
+            mock_logger,
+            mock_ip_info_mgr,
+            mock_reverse_lookup_func,
+            legacy_parser=legacy,
+        )
+        for legacy in (False, True)
+    ]
+    assert results[0] == results[1]
+
+
+def test_parse_log_fields_returns_csv_ordered_tuple(
+    current_year, mock_logger, mock_ip_info_mgr, mock_reverse_lookup_func
+):
+    log_line = "Jan  1 12:00:00 server postfix/smtpd[123]: client=unknown[1.2.3.4], sasl_username=test@example.com"
+    fields = _parse_log_fields(
+        log_line, current_year, mock_logger, mock_ip_info_mgr, mock_reverse_lookup_func
+    )
+    assert fields == (
+        "server",
+        f"01/01/{current_year} 12:00",
+        "1.2.3.4",
+        "test@example.com",
+        "null",
+        "Mocked DNS Error",
+        "N/A",
+        "N/A",
+        "N/A",
+    )
+    assert len(fields) == len(PARSED_FIELDS)
@@ -2,6 +2,8 @@ import pytest
 from pathlib import Path
 import csv
 import gzip
+import io
+import os
 from unittest.mock import (
     MagicMock,
     # call, # F401: call imported but unused
@@ -13,8 +15,11 @@ from datetime import datetime
 # Assuming utils.py is in lib.maillogsentinel and provides is_gzip
 from lib.maillogsentinel.utils import is_gzip
 from lib.maillogsentinel.parser import (
+    _CsvRowWriter,
+    _RotatedReads,
     extract_entries,
 )  # _parse_log_line is no longer here
+from lib.maillogsentinel import dns_utils
 
 # --- Mocks and Fixtures ---
 # These fixtures are still used by tests for extract_entries
@@ -84,7 +89,7 @@ def test_extract_entries_new_csv(
         {"country_code": "C2", "asn": "AS2", "aso": "ISP2"},
     ]
 
-    new_offset = extract_entries(
+    new_offset, _ = extract_entries(
         filepaths=[maillog],
         maillog_path_obj=maillog,
         csvpath_param=csv_output_path_str,
@@ -239,7 +244,7 @@ def test_extract_entries_offset_handling(
         "aso": "ISP2",
     }
 
-    new_offset = extract_entries(
+    new_offset, _ = extract_entries(
         [maillog],
         maillog,
         csv_output_path_str,
@@ -321,7 +326,7 @@ def test_extract_entries_gzip_file(
     # For gzipped files, offset is not used for reading within the file,
     # but the main maillog_path_obj might have an offset from previous runs.
     # Here, filepaths only contains the gz file, so extract_entries's internal curr_off won't apply to its content reading.
-    new_offset_returned = extract_entries(
+    new_offset_returned, _ = extract_entries(
         filepaths=[gz_file],
         maillog_path_obj=tmp_path
         / "dummy_main_mail.log",  # A dummy main log not in filepaths for this test
@@ -395,7 +400,7 @@ def test_extract_entries_empty_file(
     csv_output_path_str = str(tmp_path / "output.csv")
     maillog.write_text("")  # Empty file
 
-    new_offset = extract_entries(
+    new_offset, _ = extract_entries(
         [maillog],
         maillog,
         csv_output_path_str,
@@ -493,7 +498,7 @@ def test_extract_entries_false_rotation_scenario(
     # The order of filepaths matters: typically oldest first.
     # extract_entries processes them in the given order.
     # The key is that maillog_path_obj is correctly identified for offset logic.
-    returned_offset = extract_entries(
+    returned_offset, _ = extract_entries(
         filepaths=[rotated_log_path, main_log_path],  # Process rotated first, then main
         maillog_path_obj=main_log_path,  # Crucial: identify the main log
         csvpath_param=str(csv_output_path),
@@ -564,3 +569,337 @@ def test_extract_entries_false_rotation_scenario(
     mock_logger.debug.assert_any_call(
         f"Incremental read of {main_log_path.name} from offset {initial_offset}"
     )
+
+
+def test_extract_entries_last_line_without_newline(
+    tmp_path: Path, mock_logger, mock_ip_info_mgr, mock_reverse_lookup_func
+):
+    maillog = tmp_path / "mail.log"
+    csv_output_path_str = str(tmp_path / "output.csv")
+
+    # The final line is still being written by syslog and has no trailing newline
+    maillog.write_text(SAMPLE_LOG_LINE_1 + "\n" + SAMPLE_LOG_LINE_2)
+
+    mock_reverse_lookup_func.return_value = ("host.com", None)
+
+    new_offset, _ = extract_entries(
+        [maillog],
+        maillog,
+        csv_output_path_str,
+        mock_logger,
+        mock_ip_info_mgr,
+        mock_reverse_lookup_func,
+        is_gzip,
+        0,
+    )
+
+    with Path(csv_output_path_str).open("r") as f:
+        rows = list(csv.reader(f, delimiter=";"))
+    assert len(rows) == 3  # Header + 2 data rows
+    assert "user2@example.com" in rows[2]
+    assert new_offset == maillog.stat().st_size
+
+
+def test_extract_entries_prefetch_func_receives_unique_ips(
+    tmp_path: Path, mock_logger, mock_ip_info_mgr, mock_reverse_lookup_func
+):
+    maillog = tmp_path / "mail.log"
+    csv_output_path_str = str(tmp_path / "output.csv")
+
+    maillog.write_text(
+        "\n".join(
+            [
+                SAMPLE_LOG_LINE_1,
+                MALFORMED_LOG_LINE,
+                SAMPLE_LOG_LINE_2,
+                SAMPLE_LOG_LINE_1,
+            ]
+        )
+        + "\n"
+    )
+    prefetch_func = MagicMock()
+
+    extract_entries(
+        [maillog],
+        maillog,
+        csv_output_path_str,
+        mock_logger,
+        mock_ip_info_mgr,
+        mock_reverse_lookup_func,
+        is_gzip,
+        0,
+        prefetch_func=prefetch_func,
+    )
+
+    prefetch_func.assert_called_once_with({"1.1.1.1", "2.2.2.2"})
+    with Path(csv_output_path_str).open("r") as f:
+        rows = list(csv.reader(f, delimiter=";"))
+    assert len(rows) == 4  # Header + 3 data rows, in log order
+    assert [row[2] for row in rows[1:]] == ["1.1.1.1", "2.2.2.2", "1.1.1.1"]
+
+
+def test_extract_entries_without_prefetch_func_skips_batching(
+    tmp_path: Path, mock_logger, mock_ip_info_mgr, mock_reverse_lookup_func
+):
+    maillog = tmp_path / "mail.log"
+    maillog.write_text(SAMPLE_LOG_LINE_1 + "\n" + SAMPLE_LOG_LINE_2 + "\n")
+
+    with patch("lib.maillogsentinel.parser._prefetch_batches") as mock_batches:
+        extract_entries(
+            [maillog],
+            maillog,
+            str(tmp_path / "output.csv"),
+            mock_logger,
+            mock_ip_info_mgr,
+            mock_reverse_lookup_func,
+            is_gzip,
+            0,
+            prefetch_func=None,
+        )
+
+    mock_batches.assert_not_called()
+    assert mock_reverse_lookup_func.call_count == 2
+
+
+def test_extract_entries_returns_inode_of_log_actually_read(
+    tmp_path: Path, mock_logger, mock_ip_info_mgr, mock_reverse_lookup_func
+):
+    maillog = tmp_path / "mail.log"
+    maillog.write_text(SAMPLE_LOG_LINE_1 + "\n")
+    read_ino = maillog.stat().st_ino
+
+    def rotate_during_extraction(ips):
+        # logrotate renames the log and creates a new one while it is read
+        maillog.rename(tmp_path / "mail.log.1")
+        maillog.write_text(SAMPLE_LOG_LINE_2 + "\n")
+
+    new_offset, main_log_ino = extract_entries(
+        [maillog],
+        maillog,
+        str(tmp_path / "output.csv"),
+        mock_logger,
+        mock_ip_info_mgr,
+        mock_reverse_lookup_func,
+        is_gzip,
+        0,
+        prefetch_func=rotate_during_extraction,
+    )
+
+    assert new_offset == len(SAMPLE_LOG_LINE_1) + 1
+    assert main_log_ino == read_ino
+    assert main_log_ino != maillog.stat().st_ino
+
+
+def test_extract_entries_main_log_truncated_while_read(
+    tmp_path: Path, mock_logger, mock_ip_info_mgr, mock_reverse_lookup_func, monkeypatch
+):
+    """logrotate copytruncate empties the live log in place mid-read."""
+    maillog = tmp_path / "mail.log"
+    first_line = SAMPLE_LOG_LINE_1 + "\n"
+    maillog.write_text(first_line + SAMPLE_LOG_LINE_2 + "\n")
+    monkeypatch.setattr(
+        "lib.maillogsentinel.parser.MAIN_LOG_READ_SIZE", len(first_line)
+    )
+
+    def truncate_on_first_lookup(ip, logger):
+        with maillog.open("r+") as f:
+            f.truncate(0)
+        return None, "Mocked DNS Error"
+
+    mock_reverse_lookup_func.side_effect = truncate_on_first_lookup
+    csv_output_path_str = str(tmp_path / "output.csv")
+
+    new_offset, _ = extract_entries(
+        [maillog],
+        maillog,
+        csv_output_path_str,
+        mock_logger,
+        mock_ip_info_mgr,
+        mock_reverse_lookup_func,
+        is_gzip,
+        0,
+    )
+
+    with Path(csv_output_path_str).open("r") as f:
+        rows = list(csv.reader(f, delimiter=";"))
+    assert [row[2] for row in rows[1:]] == ["1.1.1.1"]
+    # Only what was actually read is recorded; the next run sees the smaller
+    # file and resets the offset.
+    assert new_offset == len(first_line)
+
+
+def test_extract_entries_prefetch_batches_fit_dns_cache(
+    tmp_path: Path, mock_logger, mock_ip_info_mgr, monkeypatch
+):
+    """Prefetched results must not be evicted before the rows read them."""
+    monkeypatch.setattr(
+        dns_utils,
+        "DNS_CACHE",
+        dns_utils.ReverseLookupCache(max_size=8, ttl=3600, negative_ttl=60),
+    )
+    monkeypatch.setitem(dns_utils.DNS_CACHE_SETTINGS, "enabled", True)
+    maillog = tmp_path / "mail.log"
+    ips = [f"10.0.0.{n}" for n in range(30)]
+    maillog.write_text(
+        "".join(SAMPLE_LOG_LINE_1.replace("1.1.1.1", ip) + "\n" for ip in ips * 2)
+    )
+
+    with patch(
+        "lib.maillogsentinel.dns_utils._perform_actual_reverse_lookup",
+        return_value=(None, "ERRNO 1"),
+    ) as resolver:
+        extract_entries(
+            [maillog],
+            maillog,
+            str(tmp_path / "output.csv"),
+            mock_logger,
+            mock_ip_info_mgr,
+            dns_utils.reverse_lookup,
+            is_gzip,
+            0,
+            prefetch_func=dns_utils.prefetch_reverse_lookups,
+            prefetch_max_ips=dns_utils.prefetch_batch_limit(),
+        )
+
+    # Each batch holds at most 8 unique IPs, so every prefetched result is
+    # still cached when its rows are parsed; the second pass re-resolves.
+    assert dns_utils.prefetch_batch_limit() == 8
+    assert resolver.call_count == 2 * len(ips)
+    assert sorted(c.args[0] for c in resolver.call_args_list) == sorted(ips * 2)
+
+
+@pytest.mark.parametrize("cache_size", [0, -1])
+def test_extract_entries_no_prefetch_without_dns_cache_room(
+    tmp_path: Path, mock_logger, mock_ip_info_mgr, monkeypatch, cache_size
+):
+    """A cache that stores nothing must not make each IP resolve twice."""
+    monkeypatch.setattr(
+        dns_utils,
+        "DNS_CACHE",
+        dns_utils.ReverseLookupCache(max_size=cache_size, ttl=3600, negative_ttl=60),
+    )
+    monkeypatch.setitem(dns_utils.DNS_CACHE_SETTINGS, "enabled", True)
+    maillog = tmp_path / "mail.log"
+    ips = [f"10.0.0.{n}" for n in range(5)]
+    maillog.write_text(
+        "".join(SAMPLE_LOG_LINE_1.replace("1.1.1.1", ip) + "\n" for ip in ips)
+    )
+
+    with patch(
+        "lib.maillogsentinel.dns_utils._perform_actual_reverse_lookup",
+        return_value=(None, "ERRNO 1"),
+    ) as resolver:
+        extract_entries(
+            [maillog],
+            maillog,
+            str(tmp_path / "output.csv"),
+            mock_logger,
+            mock_ip_info_mgr,
+            dns_utils.reverse_lookup,
+            is_gzip,
+            0,
+            prefetch_func=dns_utils.prefetch_reverse_lookups,
+            prefetch_max_ips=dns_utils.prefetch_batch_limit(),
+        )
+
+    assert dns_utils.prefetch_batch_limit() == 0
+    assert resolver.call_count == len(ips)
+
+
+@pytest.mark.parametrize("max_workers", [0, 1, 2])
+def test_extract_entries_multiple_rotated_files_keep_order(
+    tmp_path: Path, mock_logger, mock_ip_info_mgr, mock_reverse_lookup_func, max_workers
+):
+    rotated_gz = tmp_path / "mail.log.2.gz"
+    rotated_plain = tmp_path / "mail.log.1"
+    maillog = tmp_path / "mail.log"
+    csv_output_path_str = str(tmp_path / "output.csv")
+
+    with gzip.open(rotated_gz, "wt", encoding="utf-8") as f:
+        f.write(SAMPLE_LOG_LINE_1 + "\n" + MALFORMED_LOG_LINE + "\n")
+    rotated_plain.write_text(SAMPLE_LOG_LINE_2 + "\n")
+    maillog.write_text(SAMPLE_LOG_LINE_1 + "\n")
+
+    new_offset, _ = extract_entries(
+        [rotated_gz, rotated_plain, maillog],
+        maillog,
+        csv_output_path_str,
+        mock_logger,
+        mock_ip_info_mgr,
+        mock_reverse_lookup_func,
+        is_gzip,
+        0,
+        max_workers=max_workers,
+    )
+
+    with Path(csv_output_path_str).open("r") as f:
+        rows = list(csv.reader(f, delimiter=";"))
+    assert [row[2] for row in rows[1:]] == ["1.1.1.1", "2.2.2.2", "1.1.1.1"]
+    assert new_offset == maillog.stat().st_size
+
+
+def test_rotated_reads_bounds_files_in_flight():
+    paths = [Path(f"mail.log.{n}") for n in range(5, 0, -1)]
+    executor = MagicMock()
+    executor.submit.side_effect = lambda func, path_str, gz: MagicMock(
+        result=MagicMock(return_value=[path_str])
+    )
+
+    reads = _RotatedReads(executor, paths, lambda p: False, window=2)
+    assert executor.submit.call_count == 2
+
+    assert reads.pop(paths[0]) == ["mail.log.5"]
+    assert executor.submit.call_count == 3
+    assert paths[0] not in reads
+    # paths[1] is skipped by the caller; its read is dropped, not kept.
+    assert reads.pop(paths[2]) == ["mail.log.3"]
+    assert executor.submit.call_count == 5
+    assert paths[1] not in reads
+    assert reads.pop(paths[4]) == ["mail.log.1"]
+    assert [c.args[1] for c in executor.submit.call_args_list] == [
+        os.fspath(p) for p in paths
+    ]
+
+
+def test_extract_entries_resumes_rotated_file_from_offset(
+    tmp_path: Path, mock_logger, mock_ip_info_mgr, mock_reverse_lookup_func
+):
+    previous_log = tmp_path / "mail.log.1"
+    maillog = tmp_path / "mail.log"
+    csv_output_path_str = str(tmp_path / "output.csv")
+
+    first_line_bytes = (SAMPLE_LOG_LINE_1 + "\n").encode("utf-8")
+    previous_log.write_bytes(first_line_bytes + (SAMPLE_LOG_LINE_2 + "\n").encode())
+    maillog.write_text(SAMPLE_LOG_LINE_1 + "\n")
+
+    new_offset, _ = extract_entries(
+        [previous_log, maillog],
+        maillog,
+        csv_output_path_str,
+        mock_logger,
+        mock_ip_info_mgr,
+        mock_reverse_lookup_func,
+        is_gzip,
+        0,
+        rotated_offsets={previous_log: len(first_line_bytes)},
+    )
+
+    with Path(csv_output_path_str).open("r") as f:
+        rows = list(csv.reader(f, delimiter=";"))
+    # Only the unread tail of the previous log, then the whole new main log
+    assert [row[2] for row in rows[1:]] == ["2.2.2.2", "1.1.1.1"]
+    assert new_offset == maillog.stat().st_size
+
+
+def test_csv_row_writer_matches_csv_module():
+    rows = [
+        ("mail", "01/01/2025 12:00", "1.2.3.4", "user@example.com", "host", "OK"),
+        ("mail", "01/01/2025 12:00", "1.2.3.4", "semi;colon", "null", "ERRNO 1"),
+        ("mail", "01/01/2025 12:00", "1.2.3.4", 'quo"te', "null", "N/A"),
+        ("mail", "01/01/2025 12:00", "1.2.3.4", "line\rbreak", "", ""),
+        ("",),
+    ]
+    expected, actual = io.StringIO(), io.StringIO()
+    csv.writer(expected, delimiter=";", quoting=csv.QUOTE_MINIMAL).writerows(rows)
+    _CsvRowWriter(actual).writerows(rows)
+    assert actual.getvalue() == expected.getvalue()
@@ -4,6 +4,7 @@ from unittest.mock import patch
 import io
 import sys
 from lib.maillogsentinel.progress import (
+    NullProgressTracker,
     ProgressTracker,  # Import the class
     GREEN,
     RED,
@@ -122,6 +123,43 @@ class TestProgressModule(unittest.TestCase):
             output,
         )
 
+    @patch("lib.maillogsentinel.progress.atexit.register")
+    def test_batch_mode_buffers_until_finalize(self, mock_atexit_register):
+        tracker = ProgressTracker(batch=True)
+        mock_atexit_register.assert_called_once_with(tracker.flush)
+
+        tracker.start_step("Batched Step")
+        tracker.update_progress(1, 2)
+        tracker.update_indeterminate_progress("Working...")
+        tracker.complete_step("Batched Step", True, details="ok")
+        tracker.print_message("Batched warning", level="warning")
+        self.assertEqual(sys.stdout.getvalue(), "")  # Nothing written yet
+
+        tracker.finalize(True, "Done.")
+        output = sys.stdout.getvalue()
+        self.assertNotIn("\r", output)  # No progress redraws
+        self.assertNotIn("Batched Step...", output)
+        self.assertIn(
+            f"- Batched Step: {GREEN}{CHECK_MARK}{RESET} Completed (ok)\n", output
+        )
+        self.assertIn("Batched warning", output)
+        self.assertTrue(output.endswith(f"All steps succeeded. Done.{RESET}\n"))
+
+    @patch("sys.stderr", new_callable=io.StringIO)
+    def test_null_tracker_reports_only_errors(self, mock_stderr):
+        tracker = NullProgressTracker()
+        tracker.start_step("Quiet Step")
+        tracker.update_progress(1, 2)
+        tracker.complete_step("Quiet Step", True)
+        tracker.print_message("Just info", level="info")
+        tracker.print_message("Broken", level="error")
+        tracker.finalize(False, "Aborted.")
+
+        self.assertEqual(sys.stdout.getvalue(), "")
+        self.assertEqual(
+            mock_stderr.getvalue(), "Broken\nSome steps failed. Aborted.\n"
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
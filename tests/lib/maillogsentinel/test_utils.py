@@ -1,13 +1,26 @@
 from pathlib import Path
+import os
+import errno
+import shutil
 import logging  # Required for logger mocking or type hinting
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
+
+import pytest
 
 # Adjust the import path based on how pytest will discover your modules.
 # If 'tests' is at the same level as 'lib', and pytest runs from the root,
 # you might need to ensure 'lib' is in sys.path or use relative imports if
 # structured as a package.
 # For now, assuming direct import works or will be adjusted by pytest's path handling.
-from lib.maillogsentinel.utils import is_gzip, read_state, write_state, STATE_FILENAME
+from lib.maillogsentinel.utils import (
+    is_gzip,
+    list_all_logs,
+    move_file,
+    read_state,
+    read_state_with_inode,
+    write_state,
+    STATE_FILENAME,
+)
 
 
 def test_is_gzip():
@@ -85,6 +98,223 @@ def test_write_state_overwrite(tmp_path: Path):
     mock_logger.error.assert_not_called()
 
 
+def test_write_state_leaves_no_temp_file(tmp_path: Path):
+    """Test write_state replaces the state file atomically via a temp file."""
+    statedir = tmp_path
+    mock_logger = MagicMock(spec=logging.Logger)
+
+    write_state(statedir, 33333, logger=mock_logger)
+
+    assert [p.name for p in statedir.iterdir()] == [STATE_FILENAME]
+    assert read_state(statedir) == 33333
+
+
+def test_write_state_with_inode(tmp_path: Path):
+    """Test write_state stores the inode and read_state_with_inode returns it."""
+    statedir = tmp_path
+    mock_logger = MagicMock(spec=logging.Logger)
+
+    write_state(statedir, 4242, logger=mock_logger, inode=1337)
+
+    assert read_state_with_inode(statedir) == (4242, 1337)
+    assert read_state(statedir) == 4242
+
+
+def test_write_state_unchanged_skips_rewrite(tmp_path: Path):
+    """Test write_state does not rewrite a state file that already holds the value."""
+    mock_logger = MagicMock(spec=logging.Logger)
+    write_state(tmp_path, 4242, logger=mock_logger, inode=1337)
+
+    with patch("lib.maillogsentinel.utils.os.replace") as mock_replace:
+        write_state(tmp_path, 4242, logger=mock_logger, inode=1337)
+    mock_replace.assert_not_called()
+    assert read_state_with_inode(tmp_path) == (4242, 1337)
+
+
+def test_read_state_with_inode_legacy_file(tmp_path: Path):
+    """Test read_state_with_inode on a state file holding only an offset."""
+    state_file = tmp_path / STATE_FILENAME
+    state_file.write_text("12345")
+    assert read_state_with_inode(tmp_path) == (12345, None)
+
+
+def test_list_all_logs(tmp_path: Path):
+    """Test list_all_logs returns the main log first, then rotated files newest first."""
+    maillog = tmp_path / "mail.log"
+    maillog.write_text("current")
+    for age, name in enumerate(["mail.log.1", "mail.log.2.gz", "mail.log.10.gz"], 1):
+        rotated = tmp_path / name
+        rotated.write_text(name)
+        os.utime(rotated, (1_000_000 - age, 1_000_000 - age))
+    (tmp_path / "mail.err").write_text("unrelated")
+    (tmp_path / "mail.log.d").mkdir()  # Matches the prefix but is not a file
+
+    assert list_all_logs(maillog) == [
+        maillog,
+        tmp_path / "mail.log.1",
+        tmp_path / "mail.log.2.gz",
+        tmp_path / "mail.log.10.gz",
+    ]
+
+
+def test_list_all_logs_missing_directory(tmp_path: Path):
+    """Test list_all_logs when the log directory does not exist."""
+    assert list_all_logs(tmp_path / "missing" / "mail.log") == []
+
+
+def test_list_all_logs_skips_file_removed_during_scan(tmp_path: Path):
+    """Test list_all_logs keeps the other rotated files if one vanishes."""
+    maillog = tmp_path / "mail.log"
+    maillog.write_text("current")
+    for name in ["mail.log.1", "mail.log.2.gz"]:
+        (tmp_path / name).write_text(name)
+    real_scandir = os.scandir
+
+    class VanishingEntry:
+        def __init__(self, entry):
+            self._entry = entry
+            self.name = entry.name
+            self.path = entry.path
+
+        def is_file(self):
+            return self._entry.is_file()
+
+        def stat(self):
+            if self.name == "mail.log.1":
+                raise FileNotFoundError(self.path)
+            return self._entry.stat()
+
+    class Scan:
+        def __init__(self, path):
+            self._it = real_scandir(path)
+
+        def __enter__(self):
+            return (VanishingEntry(e) for e in self._it)
+
+        def __exit__(self, *exc):
+            self._it.close()
+
+    with patch("lib.maillogsentinel.utils.os.scandir", Scan):
+        assert list_all_logs(maillog) == [maillog, tmp_path / "mail.log.2.gz"]
+
+
+def test_move_file(tmp_path: Path):
+    """Test move_file renames a file within the same filesystem."""
+    src = tmp_path / "data.csv"
+    src.write_text("a;b\n")
+    dst = tmp_path / "backup.csv"
+
+    move_file(src, dst)
+
+    assert not src.exists()
+    assert dst.read_text() == "a;b\n"
+
+
+def test_move_file_across_filesystems(tmp_path: Path):
+    """Test move_file copies and unlinks when rename fails with EXDEV."""
+    src = tmp_path / "data.csv"
+    src.write_bytes(b"x" * 100000)
+    dst = tmp_path / "backup.csv"
+
+    with patch(
+        "lib.maillogsentinel.utils.os.rename",
+        side_effect=OSError(errno.EXDEV, "Invalid cross-device link"),
+    ):
+        move_file(src, dst)
+
+    assert not src.exists()
+    assert dst.read_bytes() == b"x" * 100000
+
+
+def test_move_file_falls_back_when_copy_file_range_unsupported(tmp_path: Path):
+    """Test move_file copies in userspace if copy_file_range rejects the pair."""
+    src = tmp_path / "data.csv"
+    src.write_bytes(b"x" * 100000)
+    dst = tmp_path / "backup.csv"
+
+    with patch(
+        "lib.maillogsentinel.utils.os.rename",
+        side_effect=OSError(errno.EXDEV, "Invalid cross-device link"),
+    ), patch(
+        "lib.maillogsentinel.utils.os.copy_file_range",
+        side_effect=OSError(errno.EXDEV, "Invalid cross-device link"),
+        create=True,
+    ) as mock_copy_file_range, patch(
+        "lib.maillogsentinel.utils.shutil.copyfileobj",
+        wraps=shutil.copyfileobj,
+    ) as mock_copyfileobj:
+        move_file(src, dst)
+
+    mock_copy_file_range.assert_called_once()
+    mock_copyfileobj.assert_called_once()
+    assert not src.exists()
+    assert dst.read_bytes() == b"x" * 100000
+
+
+def test_move_file_falls_back_when_copy_file_range_copies_nothing(tmp_path: Path):
+    """Test move_file copies in userspace if copy_file_range returns 0 early."""
+    src = tmp_path / "data.csv"
+    src.write_bytes(b"x" * 100000)
+    dst = tmp_path / "backup.csv"
+
+    with patch(
+        "lib.maillogsentinel.utils.os.rename",
+        side_effect=OSError(errno.EXDEV, "Invalid cross-device link"),
+    ), patch(
+        "lib.maillogsentinel.utils.os.copy_file_range",
+        return_value=0,
+        create=True,
+    ), patch(
+        "lib.maillogsentinel.utils.shutil.copyfileobj",
+        wraps=shutil.copyfileobj,
+    ) as mock_copyfileobj:
+        move_file(src, dst)
+
+    mock_copyfileobj.assert_called_once()
+    assert not src.exists()
+    assert dst.read_bytes() == b"x" * 100000
+
+
+def test_move_file_short_copy_keeps_src(tmp_path: Path):
+    """Test move_file raises and removes dst if fewer bytes were copied."""
+    src = tmp_path / "data.csv"
+    src.write_bytes(b"x" * 100)
+    dst = tmp_path / "backup.csv"
+
+    with patch(
+        "lib.maillogsentinel.utils.os.rename",
+        side_effect=OSError(errno.EXDEV, "Invalid cross-device link"),
+    ), patch(
+        "lib.maillogsentinel.utils._copy_file_data",
+        side_effect=lambda fsrc, fdst: fdst.write(fsrc.read(10)),
+    ):
+        with pytest.raises(OSError):
+            move_file(src, dst)
+
+    assert src.read_bytes() == b"x" * 100
+    assert not dst.exists()
+
+
+def test_move_file_removes_partial_copy_on_error(tmp_path: Path):
+    """Test move_file keeps src and removes dst when the copy fails."""
+    src = tmp_path / "data.csv"
+    src.write_bytes(b"x" * 100)
+    dst = tmp_path / "backup.csv"
+
+    with patch(
+        "lib.maillogsentinel.utils.os.rename",
+        side_effect=OSError(errno.EXDEV, "Invalid cross-device link"),
+    ), patch(
+        "lib.maillogsentinel.utils._copy_file_data",
+        side_effect=OSError(errno.ENOSPC, "No space left on device"),
+    ):
+        with pytest.raises(OSError):
+            move_file(src, dst)
+
+    assert src.read_bytes() == b"x" * 100
+    assert not dst.exists()
+
+
 # Placeholder for test_placeholder, or remove if all other tests cover discovery
 # def test_placeholder():
 #    assert True